@@ -6,6 +6,12 @@ from fastapi.middleware.cors import CORSMiddleware
 from routes.recommend import router as recommend_router
 from routes.spoilage  import router as spoilage_router
 from routes.insights  import router as insights_router
+from routes.suitability import router as suitability_router
+from routes.weather   import router as weather_router
+from services.cache_service import get_all_cache_stats
+from services.http_service import get_http_stats
+from services.llm_cache_service import get_llm_cache_stats
+from services.llm_service import get_llm_gateway_stats
 
 
 # APP SETUP
@@ -33,6 +39,8 @@ app.add_middleware(
 app.include_router(recommend_router, prefix="/api")
 app.include_router(spoilage_router,  prefix="/api")
 app.include_router(insights_router,  prefix="/api")
+app.include_router(suitability_router, prefix="/api")
+app.include_router(weather_router,   prefix="/api")
 
 
 
@@ -56,6 +64,24 @@ def health():
     return {"status": "healthy", "service": "AgriChain"}
 
 
+@app.get("/api/cache")
+def cache_stats():
+    """Hit / miss / stale counts for every shared TTL cache."""
+    return get_all_cache_stats()
+
+
+@app.get("/api/http")
+def http_stats():
+    """Per-host outbound call, retry and connection-reuse counts."""
+    return get_http_stats()
+
+
+@app.get("/api/llm")
+def llm_stats():
+    """LLM gateway latency / error rate / breaker state, and response cache hit rate."""
+    return {"gateway": get_llm_gateway_stats(), "response_cache": get_llm_cache_stats()}
+
+
 
 # RUN
 # uvicorn app:app --reload --port 8000
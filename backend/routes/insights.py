@@ -3,19 +3,25 @@
 # New insight endpoints:
 #   POST /api/arrival-prediction  — when will arrival surge crash prices?
 #   POST /api/loss-risk           — how much money at risk from spoilage?
+#   POST /api/loss-risk/portfolio — same, for thousands of warehouse lots at once
 #   POST /api/bypass-score        — should farmer skip the Arthiya?
 #   POST /api/grade-crop          — AI photo grading of produce quality
+#   GET  /api/markets/nearest     — closest mandis to a farmer, optionally for one crop
 
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel, Field
-from typing import Optional
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field, model_validator
+from typing import List, Optional
+import json
 import sys, os
+import pandas as pd
 
 sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
 
-from services.mandi_service import get_arrival_surge_prediction, get_bypass_score
-from services.crop_service  import calculate_loss_risk
-from services.llm_service   import grade_crop_from_image
+from services.mandi_service import get_arrival_surge_prediction, get_bypass_score, nearest_markets
+from services.weather_service import get_coordinates
+from services.crop_service  import calculate_loss_risk, calculate_portfolio_loss_risk
+from services.llm_service   import grade_crop_from_image_async
 
 router = APIRouter()
 
@@ -36,6 +42,28 @@ class LossRiskRequest(BaseModel):
     predicted_price:   float = Field(..., example=1500.0)
     spoilage_score:    int   = Field(..., example=45)
     storage_type:      str   = Field(default="basic_shed", example="basic_shed")
+    simulate:          bool  = Field(default=True, description="Add Monte-Carlo P10/P50/P90/P99 losses per storage option")
+
+
+class PortfolioLossRiskRequest(BaseModel):
+    """Columnar lots — every list has one entry per lot."""
+    crop:              List[str]
+    quantity_quintals: List[float]
+    predicted_price:   List[float]
+    spoilage_score:    List[float]
+    storage_type:      Optional[List[str]] = None
+    site:              Optional[List[str]] = None
+    lot_id:            Optional[List[str]] = None
+
+    @model_validator(mode="after")
+    def _same_length(self):
+        n = len(self.crop)
+        for name in ["quantity_quintals", "predicted_price", "spoilage_score",
+                     "storage_type", "site", "lot_id"]:
+            column = getattr(self, name)
+            if column is not None and len(column) != n:
+                raise ValueError(f"'{name}' has {len(column)} entries, expected {n}")
+        return self
 
 
 class BypassScoreRequest(BaseModel):
@@ -77,6 +105,7 @@ async def loss_risk(request: LossRiskRequest):
     - Cost of upgrading storage
     - Money saved by upgrading
     - ROI of the upgrade
+    - P10/P50/P90/P99 rupee loss for every storage upgrade path (simulate=true)
     """
     try:
         return calculate_loss_risk(
@@ -84,12 +113,61 @@ async def loss_risk(request: LossRiskRequest):
             quantity_quintals = request.quantity_quintals,
             predicted_price   = request.predicted_price,
             spoilage_score    = request.spoilage_score,
-            storage_type      = request.storage_type
+            storage_type      = request.storage_type,
+            simulate          = request.simulate
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# ─────────────────────────────────────────
+# POST /api/loss-risk/portfolio
+# ─────────────────────────────────────────
+@router.post("/loss-risk/portfolio")
+async def loss_risk_portfolio(request: PortfolioLossRiskRequest):
+    """
+    Bulk loss risk for an FPO's warehouse lots.
+
+    Streams newline-delimited JSON:
+      line 1    → {"type": "summary", "totals", "by_site", "by_crop"}
+      then      → {"type": "lot", ...} per lot, in input order
+    """
+    n = len(request.crop)
+    if n == 0:
+        raise HTTPException(status_code=400, detail="No lots provided.")
+
+    try:
+        lots = pd.DataFrame({
+            "lot_id":            request.lot_id or [str(i) for i in range(1, n + 1)],
+            "site":              request.site or ["Unassigned"] * n,
+            "crop":              request.crop,
+            "quantity_quintals": request.quantity_quintals,
+            "predicted_price":   request.predicted_price,
+            "spoilage_score":    request.spoilage_score,
+            "storage_type":      request.storage_type or ["basic_shed"] * n
+        })
+        portfolio = calculate_portfolio_loss_risk(lots)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    def _stream(chunk_size: int = 5000):
+        yield json.dumps({
+            "type":    "summary",
+            "totals":  portfolio["totals"],
+            "by_site": portfolio["by_site"],
+            "by_crop": portfolio["by_crop"]
+        }, ensure_ascii=False) + "\n"
+
+        per_lot = portfolio["lots"]
+        per_lot.insert(0, "type", "lot")
+        for start in range(0, len(per_lot), chunk_size):
+            yield per_lot.iloc[start:start + chunk_size].to_json(
+                orient="records", lines=True, force_ascii=False
+            ).rstrip("\n") + "\n"
+
+    return StreamingResponse(_stream(), media_type="application/x-ndjson")
+
+
 # ─────────────────────────────────────────
 # POST /api/bypass-score
 # ─────────────────────────────────────────
@@ -122,6 +200,39 @@ async def grade_crop(request: GradeRequest):
     using Groq's llama-3.2-11b-vision model.
     """
     try:
-        return grade_crop_from_image(request.image_base64, request.crop)
+        return await grade_crop_from_image_async(request.image_base64, request.crop)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# ─────────────────────────────────────────
+# GET /api/markets/nearest
+# ─────────────────────────────────────────
+@router.get("/markets/nearest")
+def markets_nearest(
+    lat:       Optional[float] = Query(default=None, example=18.52),
+    lon:       Optional[float] = Query(default=None, example=73.86),
+    district:  Optional[str]   = Query(default=None, example="Pune"),
+    state:     Optional[str]   = Query(default=None, example="Maharashtra"),
+    commodity: Optional[str]   = Query(default=None, example="Tomato"),
+    k:         int             = Query(default=5, ge=1, le=50)
+):
+    """
+    The k mandis closest to the farmer — from lat/lon, or the district's
+    coordinates — with straight-line and estimated road distance. With
+    commodity, only mandis that trade it, plus their latest modal price.
+    """
+    if lat is None or lon is None:
+        if not district or not state:
+            raise HTTPException(status_code=400, detail="Provide lat/lon or district/state.")
+        coords   = get_coordinates(district, state)
+        lat, lon = coords["lat"], coords["lon"]
+
+    try:
+        result = nearest_markets(lat, lon, k=k, commodity=commodity)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+    if "error" in result:
+        raise HTTPException(status_code=404, detail=result["error"])
+    return {"success": True, **result}
@@ -2,36 +2,51 @@
 # Main recommendation endpoint
 
 from fastapi import APIRouter, HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
+from typing import List, Optional
 import sys
 import os
-import math
+import json
+import time
+import asyncio
+import numpy as np
 from dotenv import load_dotenv
-from py_olamaps.OlaMaps import OlaMaps
 
 load_dotenv()
 
 sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
 
 from services.mandi_service import get_mandi_insight
-from services.weather_service import get_weather_insight, get_coordinates
+from services.weather_service import get_weather_insight_async, get_coordinates, get_coordinates_async
 from services.crop_service import get_crop_insight
-from services.llm_service import generate_recommendation
+from services.llm_service import generate_recommendation_async, stream_recommendation, LLMUnavailable
 from services.explainability_service import build_explainable_from_context
+from services import http_service
+from services.route_service import get_cached_route, save_route, get_route_cache_stats
+from services.geo_service import ROAD_FACTOR, AVG_SPEED_KMH, haversine_km
 
 router = APIRouter()
 
 
-OLA_MAPS_API_KEY = os.getenv("OLA_MAPS_API_KEY")
+OLA_MAPS_API_KEY    = os.getenv("OLA_MAPS_API_KEY")
+RECOMMEND_BUDGET    = float(os.getenv("RECOMMEND_BUDGET_SECONDS", "20"))   # whole request, LLM gets what is left
+OLA_DIRECTIONS_URL  = "https://api.olamaps.io/routing/v1/directions"
 
 
-def _haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
-    """Straight-line distance between two lat/lon points in km."""
-    R = 6371.0
-    dlat = math.radians(lat2 - lat1)
-    dlon = math.radians(lon2 - lon1)
-    a = math.sin(dlat / 2) ** 2 + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(dlon / 2) ** 2
-    return R * 2 * math.asin(math.sqrt(a))
+def _ola_directions(origin: str, destination: str) -> dict:
+    """
+    OLA Maps directions over the shared keep-alive session.
+    Same request py_olamaps' routing.directions() sends, minus the new
+    client (and OAuth round trip) it needs per call.
+    """
+    response = http_service.post(
+        OLA_DIRECTIONS_URL,
+        params={"origin": origin, "destination": destination, "api_key": OLA_MAPS_API_KEY}
+    )
+    response.raise_for_status()
+    return response.json()
 
 
 def _estimate_from_haversine(origin_coords: dict, dest_coords: dict) -> dict:
@@ -40,28 +55,30 @@ def _estimate_from_haversine(origin_coords: dict, dest_coords: dict) -> dict:
     Road factor 1.35 is typical for Indian inter-city routes.
     Average speed 50 km/h for Indian highways.
     """
-    straight_km = _haversine_km(
+    straight_km = float(haversine_km(
         origin_coords["lat"], origin_coords["lon"],
         dest_coords["lat"],   dest_coords["lon"]
-    )
-    road_km     = round(straight_km * 1.35, 1)
-    hours       = round(road_km / 50, 1)
-
-    if hours < 2:
-        summary = f"Close market: ~{hours} hrs (~{road_km} km). Low transit risk."
-    elif hours < 4:
-        summary = f"Moderate distance: ~{hours} hrs (~{road_km} km). Plan early departure."
-    else:
-        summary = f"Long distance: ~{hours} hrs (~{road_km} km). Consider overnight storage."
+    ))
+    road_km     = round(straight_km * ROAD_FACTOR, 1)
+    hours       = round(road_km / AVG_SPEED_KMH, 1)
 
     return {
         "transit_hours": max(hours, 1.0),
         "distance_km":   road_km,
         "source":        "estimated",
-        "route_summary": summary,
+        "route_summary": _transit_summary(hours, road_km, approx=True),
     }
 
 
+def _transit_summary(hours: float, km: float, approx: bool = False) -> str:
+    h, d = (f"~{hours}", f"~{km}") if approx else (f"{hours}", f"{km}")
+    if hours < 2:
+        return f"Close market: {h} hrs ({d} km). Low transit risk."
+    if hours < 4:
+        return f"Moderate distance: {h} hrs ({d} km). Plan early departure."
+    return f"Long distance: {h} hrs ({d} km). Consider overnight storage."
+
+
 class RecommendRequest(BaseModel):
     crop: str = Field(..., example="Tomato")
     variety: str = Field(default="Local", example="Local")
@@ -117,6 +134,8 @@ def get_transit_time_ola(
 ) -> dict:
     """
     Calculates driving time using OLA Maps.
+    Routes are cached per origin/destination (route_service), so each pair
+    is fetched from OLA once per ROUTE_TTL_DAYS.
     Falls back to a 6-hour default if API is unavailable.
     """
     default_result = {
@@ -137,22 +156,29 @@ def get_transit_time_ola(
         origin_str = f"{origin_coords['lat']},{origin_coords['lon']}"
         dest_str   = f"{dest_coords['lat']},{dest_coords['lon']}"
 
+        cached = get_cached_route(origin_coords, dest_coords)
+        if cached:
+            return cached
+
         print(f"[Transit] {origin_district} {origin_coords} → {dest_market} {dest_coords}")
 
         # Haversine baseline — used to sanity-check the OLA Maps result
-        haversine_km = _haversine_km(
+        straight_km = float(haversine_km(
             origin_coords["lat"], origin_coords["lon"],
             dest_coords["lat"],   dest_coords["lon"]
-        )
-        print(f"[Transit] Haversine straight-line: {round(haversine_km, 1)} km")
+        ))
+        print(f"[Transit] Haversine straight-line: {round(straight_km, 1)} km")
 
-        client = OlaMaps(api_key=OLA_MAPS_API_KEY)
-        result = client.routing.directions(origin_str, dest_str)
+        result = _ola_directions(origin_str, dest_str)
 
         routes = result.get("routes", [])
         if not routes:
             print("[Transit] OLA Maps returned no routes. Using Haversine estimate.")
-            return _estimate_from_haversine(origin_coords, dest_coords)
+            route = {**_estimate_from_haversine(origin_coords, dest_coords),
+                     "sanity_check": {"haversine_km": round(straight_km, 1), "route_km": None,
+                                      "passed": False}}
+            save_route(origin_coords, dest_coords, route)
+            return route
 
         leg = routes[0]["legs"][0]
         duration_raw  = leg.get("duration", 0)
@@ -169,33 +195,34 @@ def get_transit_time_ola(
 
         # Sanity check: a real road distance must be ≥ 70% of the straight-line distance.
         # If OLA Maps reports less, it has returned a wrong/partial route — use Haversine estimate.
-        if haversine_km > 5 and distance_km < haversine_km * 0.70:
-            print(f"[Transit] OLA Maps distance ({distance_km} km) < 60% of straight-line "
-                  f"({round(haversine_km, 1)} km). Switching to Haversine estimate.")
-            return _estimate_from_haversine(origin_coords, dest_coords)
+        sanity = {"haversine_km": round(straight_km, 1), "route_km": distance_km,
+                  "passed": not (straight_km > 5 and distance_km < straight_km * 0.70)}
+
+        if not sanity["passed"]:
+            print(f"[Transit] OLA Maps distance ({distance_km} km) < 70% of straight-line "
+                  f"({round(straight_km, 1)} km). Switching to Haversine estimate.")
+            route = _estimate_from_haversine(origin_coords, dest_coords)
 
         # Local / same-location guard
-        if transit_hours < 0.5 or distance_km < 2:
-            return {
+        elif transit_hours < 0.5 or distance_km < 2:
+            route = {
                 "transit_hours": 1.0,
                 "distance_km":   distance_km,
                 "source":        "ola_maps",
                 "route_summary": "Local market: estimated 1 hr travel time.",
             }
 
-        if transit_hours < 2:
-            summary = f"Close market: {transit_hours} hrs ({distance_km} km). Low transit risk."
-        elif transit_hours < 4:
-            summary = f"Moderate distance: {transit_hours} hrs ({distance_km} km). Plan early departure."
         else:
-            summary = f"Long distance: {transit_hours} hrs ({distance_km} km). Consider overnight storage."
+            route = {
+                "transit_hours": transit_hours,
+                "distance_km":   distance_km,
+                "source":        "ola_maps",
+                "route_summary": _transit_summary(transit_hours, distance_km),
+            }
 
-        return {
-            "transit_hours": transit_hours,
-            "distance_km":   distance_km,
-            "source":        "ola_maps",
-            "route_summary": summary,
-        }
+        route["sanity_check"] = sanity
+        save_route(origin_coords, dest_coords, route)
+        return route
 
     except Exception as e:
         print(f"[Transit] Error: {e}. Falling back to Haversine estimate.")
@@ -207,102 +234,134 @@ def get_transit_time_ola(
             return default_result
 
 
-@router.post("/recommend", response_model=RecommendResponse)
-async def recommend(request: RecommendRequest):
+async def _gather_recommendation(request: RecommendRequest):
     """
-    Master recommendation endpoint.
-    Combines mandi, weather, crop-soil, transit and explainability outputs.
+    Runs mandi, weather, transit and crop-soil analysis for a request.
+    Returns (llm_context, structured results) — shared by /recommend and
+    /recommend/stream.
     """
-    try:
-        mandi_result = get_mandi_insight(
-            state=request.state,
-            district=request.district,
-            market=request.market,
-            commodity=request.crop,
-            variety=request.variety,
-            grade=request.grade,
-            date=request.harvest_date,
-        )
+    # Weather is fetched on the shared I/O loop while the price model runs
+    weather_task = asyncio.ensure_future(
+        get_weather_insight_async(city=request.district, state=request.state)
+    )
 
-        weather_result = get_weather_insight(city=request.district, state=request.state)
+    mandi_result = get_mandi_insight(
+        state=request.state,
+        district=request.district,
+        market=request.market,
+        commodity=request.crop,
+        variety=request.variety,
+        grade=request.grade,
+        date=request.harvest_date,
+    )
 
-        best_market = mandi_result["best_markets"].get("best_market", request.market)
+    weather_result = await weather_task
 
-        if request.transit_hours == 0:
-            transit_info = get_transit_time_ola(
-                origin_district=request.district,
-                origin_state=request.state,
-                dest_market=best_market,
-                dest_state=request.state,
-            )
-            transit_hours = transit_info["transit_hours"]
-        else:
-            transit_hours = request.transit_hours
-            # Estimate distance from provided hours (50 km/h avg Indian highway speed)
-            est_distance_km = round(transit_hours * 50, 1)
-            transit_info = {
-                "transit_hours": transit_hours,
-                "distance_km": est_distance_km,
-                "source": "farmer_provided",
-                "route_summary": f"Transit time provided: {transit_hours}h (~{est_distance_km} km estimated)",
-            }
+    best_market = mandi_result["best_markets"].get("best_market", request.market)
 
-        crop_result = get_crop_insight(
-            crop=request.crop,
-            district=request.district,
-            ph=request.ph,
-            soil_ec=request.soil_ec,
-            phosphorus=request.phosphorus,
-            potassium=request.potassium,
-            urea=request.urea,
-            tsp=request.tsp,
-            mop=request.mop,
-            moisture=request.moisture,
-            temperature=request.temperature,
-            storage_type=request.storage_type,
-            transit_hours=transit_hours,
-            spoilage_factor=weather_result["current"].get("spoilage_factor", 1.0),
+    if request.transit_hours == 0:
+        transit_info = get_transit_time_ola(
+            origin_district=request.district,
+            origin_state=request.state,
+            dest_market=best_market,
+            dest_state=request.state,
         )
-
-        price_data = mandi_result["price_prediction"]
-        trend_data = mandi_result["price_trend"]
-        market_data = mandi_result["best_markets"]
-        weather_data = weather_result["current"]
-        forecast = weather_result["forecast"]
-        suitability = crop_result["suitability"]
-        spoilage = crop_result["spoilage"]
-
-        def _fmt_price(val) -> str:
-            try:
-                return f"{float(val):,.2f}"
-            except (TypeError, ValueError):
-                return "N/A"
-
-        llm_context = {
-            "crop": request.crop,
-            "state": request.state,
-            "district": request.district,
-            "predicted_price": _fmt_price(price_data.get('predicted_price', 0)),
-            "price_trend": f"{trend_data.get('trend', 'stable')} ({trend_data.get('change_pct', 0)}%)",
-            "best_market": market_data.get("best_market", request.market),
-            "best_market_price": _fmt_price(market_data.get('best_price', 0)),
-            "harvest_window": f"Around {request.harvest_date}",
-            "best_harvest_day": forecast.get("best_day", request.harvest_date),
-            "weather": weather_data.get("weather_summary", "N/A"),
-            "harvest_risk": weather_data.get("harvest_risk", "Low"),
-            "spoilage_risk": spoilage.get("risk_level", "Low"),
-            "days_safe": spoilage.get("days_safe", 7),
+        transit_hours = transit_info["transit_hours"]
+    else:
+        transit_hours = request.transit_hours
+        # Estimate distance from provided hours (50 km/h avg Indian highway speed)
+        est_distance_km = round(transit_hours * 50, 1)
+        transit_info = {
             "transit_hours": transit_hours,
-            "transit_summary": transit_info.get("route_summary", ""),
-            "preservation_actions": ", ".join([a["action"] for a in spoilage.get("actions", [])[:3]]),
-            "is_crop_suitable": suitability.get("is_suitable", False),
-            "recommended_crop": suitability.get("recommended_crop", request.crop),
-            "suitability_score": suitability.get("suitability_score", 50),
-            "soil_ph": request.ph,
-            "soil_moisture": request.moisture,
+            "distance_km": est_distance_km,
+            "source": "farmer_provided",
+            "route_summary": f"Transit time provided: {transit_hours}h (~{est_distance_km} km estimated)",
         }
 
-        recommendation_text = generate_recommendation(llm_context, language=request.language)
+    crop_result = get_crop_insight(
+        crop=request.crop,
+        district=request.district,
+        ph=request.ph,
+        soil_ec=request.soil_ec,
+        phosphorus=request.phosphorus,
+        potassium=request.potassium,
+        urea=request.urea,
+        tsp=request.tsp,
+        mop=request.mop,
+        moisture=request.moisture,
+        temperature=request.temperature,
+        storage_type=request.storage_type,
+        transit_hours=transit_hours,
+        spoilage_factor=weather_result["current"].get("spoilage_factor", 1.0),
+        state=request.state,
+    )
+
+    price_data = mandi_result["price_prediction"]
+    trend_data = mandi_result["price_trend"]
+    market_data = mandi_result["best_markets"]
+    weather_data = weather_result["current"]
+    forecast = weather_result["forecast"]
+    suitability = crop_result["suitability"]
+    spoilage = crop_result["spoilage"]
+
+    def _fmt_price(val) -> str:
+        try:
+            return f"{float(val):,.2f}"
+        except (TypeError, ValueError):
+            return "N/A"
+
+    llm_context = {
+        "crop": request.crop,
+        "state": request.state,
+        "district": request.district,
+        "predicted_price": _fmt_price(price_data.get('predicted_price', 0)),
+        "price_trend": f"{trend_data.get('trend', 'stable')} ({trend_data.get('change_pct', 0)}%)",
+        "best_market": market_data.get("best_market", request.market),
+        "best_market_price": _fmt_price(market_data.get('best_price', 0)),
+        "harvest_window": f"Around {request.harvest_date}",
+        "best_harvest_day": forecast.get("best_day", request.harvest_date),
+        "weather": weather_data.get("weather_summary", "N/A"),
+        "harvest_risk": weather_data.get("harvest_risk", "Low"),
+        "spoilage_risk": spoilage.get("risk_level", "Low"),
+        "days_safe": spoilage.get("days_safe", 7),
+        "transit_hours": transit_hours,
+        "transit_summary": transit_info.get("route_summary", ""),
+        "preservation_actions": ", ".join([a["action"] for a in spoilage.get("actions", [])[:3]]),
+        "is_crop_suitable": suitability.get("is_suitable", False),
+        "recommended_crop": suitability.get("recommended_crop", request.crop),
+        "suitability_score": suitability.get("suitability_score", 50),
+        "soil_ph": request.ph,
+        "soil_moisture": request.moisture,
+    }
+
+    results = {
+        "crop": request.crop,
+        "state": request.state,
+        "price_prediction": price_data,
+        "price_trend": trend_data,
+        "best_markets": market_data,
+        "weather": weather_data,
+        "crop_suitability": suitability,
+        "micronutrient": crop_result["micronutrient"],
+        "spoilage": spoilage,
+        "transit_info": transit_info,
+    }
+    return llm_context, results
+
+
+@router.post("/recommend", response_model=RecommendResponse)
+async def recommend(request: RecommendRequest):
+    """
+    Master recommendation endpoint.
+    Combines mandi, weather, crop-soil, transit and explainability outputs.
+    """
+    deadline = time.monotonic() + RECOMMEND_BUDGET
+    try:
+        llm_context, results = await _gather_recommendation(request)
+
+        recommendation_text = await generate_recommendation_async(
+            llm_context, language=request.language, deadline=deadline
+        )
         explainability = build_explainable_from_context(
             recommendation=recommendation_text,
             context=llm_context,
@@ -310,24 +369,78 @@ async def recommend(request: RecommendRequest):
 
         return RecommendResponse(
             success=True,
-            crop=request.crop,
-            state=request.state,
             recommendation=recommendation_text,
             explainability=explainability,
-            price_prediction=price_data,
-            price_trend=trend_data,
-            best_markets=market_data,
-            weather=weather_data,
-            crop_suitability=suitability,
-            micronutrient=crop_result["micronutrient"],
-            spoilage=spoilage,
-            transit_info=transit_info,
+            **results,
         )
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Recommendation failed: {str(e)}")
 
 
+# ─────────────────────────────────────────
+# STREAMING RECOMMENDATION — server-sent events
+# POST /api/recommend/stream
+#   event: results         → price, trend, markets, weather, spoilage ... (as soon as ready)
+#   event: token           → {"text": "..."} LLM output as it is generated
+#   event: explainability  → {"recommendation": full text, "explainability": {...}}
+#   event: done            → {}
+#   event: error           → {"detail": "..."} (then the stream ends; "truncated": true
+#                            if the LLM stopped after some tokens were sent)
+# ─────────────────────────────────────────
+def _sse(event: str, data) -> str:
+    payload = json.dumps(jsonable_encoder(data), ensure_ascii=False)
+    return f"event: {event}\ndata: {payload}\n\n"
+
+
+@router.post("/recommend/stream")
+async def recommend_stream(request: RecommendRequest):
+    """
+    Same analysis as /api/recommend, streamed for slow (2G/3G) connections:
+    structured results first, then the LLM advice token by token, then the
+    explainability block.
+    """
+    deadline = time.monotonic() + RECOMMEND_BUDGET
+
+    async def _events():
+        try:
+            llm_context, results = await _gather_recommendation(request)
+        except Exception as e:
+            yield _sse("error", {"detail": f"Recommendation failed: {str(e)}"})
+            return
+        yield _sse("results", {"success": True, **results})
+
+        chunks = []
+        try:
+            async for chunk in stream_recommendation(llm_context, language=request.language,
+                                                     deadline=deadline):
+                chunks.append(chunk)
+                yield _sse("token", {"text": chunk})
+        except LLMUnavailable as e:
+            # Tokens already went out — don't present cut-off advice as complete
+            yield _sse("error", {"detail": f"Recommendation incomplete — {str(e)}", "truncated": True})
+            return
+
+        recommendation_text = "".join(chunks)
+        try:
+            explainability = build_explainable_from_context(
+                recommendation=recommendation_text,
+                context=llm_context,
+            )
+        except Exception as e:
+            yield _sse("error", {"detail": f"Explainability failed: {str(e)}"})
+            return
+        yield _sse("explainability", {"recommendation": recommendation_text,
+                                      "explainability": explainability})
+        yield _sse("done", {})
+
+    return StreamingResponse(
+        _events(),
+        media_type = "text/event-stream",
+        headers    = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.get("/price")
 async def quick_price(
     crop: str,
@@ -377,3 +490,120 @@ async def transit(origin: str, state: str, dest: str):
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/transit/cache")
+def transit_cache():
+    """Hit-rate and size of the persistent OLA Maps route cache."""
+    return get_route_cache_stats()
+
+
+# ─────────────────────────────────────────
+# TRANSIT MATRIX — one origin, many candidate markets
+# POST /api/transit/matrix
+# Every market gets an answer from the route cache or the vectorized
+# Haversine estimate; real OLA routes are fetched (concurrently) only
+# for the fetch_top closest markets that aren't cached yet.
+# ─────────────────────────────────────────
+MAX_MATRIX_MARKETS = 100
+
+
+class TransitCandidate(BaseModel):
+    market: str           = Field(..., example="Nashik")
+    state:  Optional[str] = Field(default=None, example="Maharashtra",
+                                  description="Defaults to the origin state")
+
+
+class TransitMatrixRequest(BaseModel):
+    origin:    str = Field(..., example="Pune")
+    state:     str = Field(..., example="Maharashtra")
+    markets:   List[TransitCandidate] = Field(
+        ..., example=[{"market": "Nashik"}, {"market": "Mumbai"}, {"market": "Satara"}]
+    )
+    fetch_top: int = Field(default=3, ge=0, le=10,
+                           description="Closest uncached markets to fetch real OLA routes for")
+
+
+async def _candidate_coordinates(origin: str, state: str, candidates: list) -> list:
+    # Runs on the http_service I/O loop — unknown names (origin included) geocode concurrently
+    return await asyncio.gather(get_coordinates_async(origin, state),
+                                *(get_coordinates_async(m, s) for m, s in candidates))
+
+
+async def get_transit_matrix(origin: str, state: str, candidates: list, fetch_top: int = 3) -> dict:
+    origin_coords, *dest_coords = await http_service.await_io(
+        _candidate_coordinates(origin, state, candidates)
+    )
+
+    road_km = haversine_km(
+        origin_coords["lat"], origin_coords["lon"],
+        np.array([d["lat"] for d in dest_coords]),
+        np.array([d["lon"] for d in dest_coords])
+    ) * ROAD_FACTOR
+    hours   = road_km / AVG_SPEED_KMH
+
+    rows = []
+    for (market, dest_state), dest, km, h in zip(candidates, dest_coords, road_km.tolist(), hours.tolist()):
+        cached = get_cached_route(origin_coords, dest)
+        if cached:
+            route = {**cached, "cached": True}
+        else:
+            route = {
+                "transit_hours": max(round(h, 1), 1.0),
+                "distance_km":   round(km, 1),
+                "source":        "estimated",
+                "route_summary": _transit_summary(round(h, 1), round(km, 1), approx=True),
+                "cached":        False
+            }
+        rows.append({"market": market.title(), "state": dest_state.title(),
+                     "lat": dest["lat"], "lon": dest["lon"], **route})
+
+    fetch = []
+    if OLA_MAPS_API_KEY and fetch_top:
+        closest = sorted(range(len(rows)), key=lambda i: rows[i]["transit_hours"])
+        fetch   = [i for i in closest[:fetch_top] if not rows[i]["cached"]]
+    fetched = await asyncio.gather(*(
+        asyncio.to_thread(get_transit_time_ola, origin, state, *candidates[i]) for i in fetch
+    ))
+    for i, route in zip(fetch, fetched):
+        rows[i].update(route, cached=False)
+
+    rows.sort(key=lambda r: r["transit_hours"])
+    return {
+        "origin":  {"district": origin.title(), "state": state.title(), **origin_coords},
+        "markets": rows,
+        "fastest": rows[0]["market"] if rows else None,
+        "summary": {
+            "candidates": len(rows),
+            "from_cache": sum(r["cached"] for r in rows),
+            "fetched":    len(fetch),
+            "estimated":  sum(r["source"] == "estimated" for r in rows)
+        }
+    }
+
+
+@router.post("/transit/matrix")
+async def transit_matrix(request: TransitMatrixRequest):
+    """
+    Transit time from one origin to up to 100 candidate markets in one
+    call, fastest first. Cached routes and straight-line estimates are
+    returned for every market; real OLA Maps routes are fetched only for
+    the closest few that aren't cached yet.
+    """
+    candidates = {}
+    for c in request.markets:
+        market, dest_state = c.market.strip(), (c.state or request.state).strip()
+        if market.lower() != request.origin.strip().lower():
+            candidates.setdefault(f"{market.lower()}|{dest_state.lower()}", (market, dest_state))
+
+    if not candidates:
+        raise HTTPException(status_code=400, detail="Provide at least one market other than the origin.")
+    if len(candidates) > MAX_MATRIX_MARKETS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_MATRIX_MARKETS} markets per request.")
+
+    try:
+        result = await get_transit_matrix(request.origin, request.state,
+                                          list(candidates.values()), request.fetch_top)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return {"success": True, **result}
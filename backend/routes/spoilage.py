@@ -6,12 +6,17 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, Field
 import sys, os
+import numpy as np
 
 sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
 
-from services.crop_service    import get_spoilage_risk, get_micronutrient_warnings, calculate_loss_risk
-from services.weather_service import get_current_weather
-from services.llm_service     import generate_spoilage_advice
+from services.crop_service    import (
+    get_spoilage_risk, get_micronutrient_warnings,
+    calculate_loss_risk, get_spoilage_surface,
+    simulate_spoilage
+)
+from services.weather_service import get_current_weather, get_weather_insight_async, interpret_weather
+from services.llm_service     import generate_spoilage_advice_async
 
 router = APIRouter()
 
@@ -72,7 +77,7 @@ async def spoilage(request: SpoilageRequest):
         )
 
         # ── Get micronutrient warnings ──
-        micro_result = get_micronutrient_warnings(request.district)
+        micro_result = get_micronutrient_warnings(request.district, request.state)
 
         # ── Generate LLM advice ──
         llm_context = {
@@ -83,7 +88,7 @@ async def spoilage(request: SpoilageRequest):
             "humidity":      f"{humidity}%",
             "spoilage_score": spoilage_result["risk_score"]
         }
-        llm_advice = generate_spoilage_advice(llm_context)
+        llm_advice = await generate_spoilage_advice_async(llm_context)
 
         # ── Financial loss risk (if price provided) ──
         loss_risk_result = None
@@ -115,6 +120,127 @@ async def spoilage(request: SpoilageRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# ─────────────────────────────────────────
+# SPOILAGE WHAT-IF SURFACE
+# POST /api/spoilage/surface
+# ─────────────────────────────────────────
+class SpoilageSurfaceRequest(BaseModel):
+    crop:              str   = Field(...,         example="Tomato")
+    district:          str   = Field(...,         example="Pune")
+    state:             str   = Field(...,         example="Maharashtra")
+    max_transit_hours: float = Field(default=48.0, gt=0, le=240, example=48.0)
+    transit_step:      float = Field(default=2.0,  gt=0, example=2.0)
+
+    # Optional — if not provided, current weather + 5-day forecast are used
+    temperature:   float = Field(default=None, example=30.0)
+    humidity:      float = Field(default=None, example=65.0)
+
+
+@router.post("/spoilage/surface")
+async def spoilage_surface(request: SpoilageSurfaceRequest):
+    """
+    Risk score and days safe for every storage type × transit time,
+    for current weather and each forecast day, in one response.
+
+    risk_score[c][s][t] → conditions[c], storage_types[s], transit_hours[t]
+    """
+    try:
+        # ── Weather conditions axis ──
+        if request.temperature is not None and request.humidity is not None:
+            conditions = [{
+                "label":           "provided",
+                "temperature":     request.temperature,
+                "humidity":        request.humidity,
+                "spoilage_factor": 1.0
+            }]
+        else:
+            weather = await get_weather_insight_async(request.district, request.state)
+            current = weather["current"]
+            conditions = [{
+                "label":           "now",
+                "temperature":     current.get("temperature", 30.0),
+                "humidity":        current.get("humidity",    65.0),
+                "spoilage_factor": current.get("spoilage_factor", 1.0)
+            }]
+            for day in weather["forecast"].get("forecast", []):
+                signals = interpret_weather(day["temperature"], day["humidity"],
+                                            day.get("rainfall_mm", 0), 0)
+                conditions.append({
+                    "label":           day["date"],
+                    "temperature":     day["temperature"],
+                    "humidity":        day["humidity"],
+                    "spoilage_factor": signals["spoilage_factor"]
+                })
+
+        # ── Transit hours axis (capped at 241 points) ──
+        step  = max(request.transit_step, request.max_transit_hours / 240)
+        hours = np.round(np.arange(0, request.max_transit_hours + step / 2, step), 2).tolist()
+
+        surface = get_spoilage_surface(
+            crop             = request.crop,
+            transit_hours    = hours,
+            temperatures     = [c["temperature"]     for c in conditions],
+            humidities       = [c["humidity"]        for c in conditions],
+            spoilage_factors = [c["spoilage_factor"] for c in conditions]
+        )
+
+        return {
+            "success":    True,
+            "district":   request.district,
+            "conditions": conditions,
+            **surface
+        }
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# ─────────────────────────────────────────
+# HOUR-BY-HOUR SPOILAGE SIMULATION
+# POST /api/spoilage/simulate
+# ─────────────────────────────────────────
+class SpoilageSimulationRequest(BaseModel):
+    crop:          str   = Field(...,          example="Tomato")
+    district:      str   = Field(...,          example="Pune")
+    state:         str   = Field(...,          example="Maharashtra")
+    storage_type:  str   = Field(default="basic_shed", example="basic_shed")
+    transit_hours: float = Field(default=6.0,  ge=0, example=6.0)
+
+
+@router.post("/spoilage/simulate")
+async def spoilage_simulate(request: SpoilageSimulationRequest):
+    """
+    Runs the spoilage model step by step over the 3-hourly 5-day forecast.
+
+    Returns the remaining shelf-life curve for every storage type and the
+    latest safe time to leave for market.
+    """
+    try:
+        weather  = await get_weather_insight_async(request.district, request.state)
+        forecast = weather["forecast"]
+
+        result = simulate_spoilage(
+            crop          = request.crop,
+            storage_type  = request.storage_type,
+            timeline      = forecast.get("timeline", []),
+            transit_hours = request.transit_hours
+        )
+        if "error" in result:
+            raise HTTPException(status_code=503, detail=result["error"])
+
+        return {
+            "success":        True,
+            "district":       request.district,
+            "weather_source": forecast.get("source", "unknown"),
+            **result
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 # ─────────────────────────────────────────
 # STORAGE TYPES INFO ENDPOINT
 # GET /api/storage-types
@@ -0,0 +1,157 @@
+# backend/routes/suitability.py
+#
+# Bulk soil-suitability endpoints for extension officers
+#   POST /api/suitability/batch  — score a whole Soil Health Card export
+#   POST /api/suitability/rank   — rank every profiled crop for one soil sample
+#   GET  /api/suitability/cache  — hit-rate of the memoized model predictions
+#   DELETE /api/suitability/cache — drop them (after retraining the model)
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+import io
+import json
+import sys, os
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from services import crop_service
+from services.crop_service import (
+    normalize_soil_frame,
+    check_crop_suitability_batch,
+    rank_crops_for_soil,
+    get_suitability_cache_stats,
+    clear_suitability_cache
+)
+
+router = APIRouter()
+
+
+# ─────────────────────────────────────────
+# REQUEST MODELS
+# ─────────────────────────────────────────
+class SoilSampleRequest(BaseModel):
+    ph:          float = Field(default=6.5,   example=6.5)
+    soil_ec:     float = Field(default=0.6,   example=0.6)
+    phosphorus:  float = Field(default=20.0,  example=20.0)
+    potassium:   float = Field(default=150.0, example=150.0)
+    urea:        float = Field(default=50.0,  example=50.0)
+    tsp:         float = Field(default=22.0,  example=22.0)
+    mop:         float = Field(default=30.0,  example=30.0)
+    moisture:    float = Field(default=68.0,  example=68.0)
+    temperature: float = Field(default=72.0,  example=72.0)
+
+
+# ─────────────────────────────────────────
+# HELPER — READ PLOTS FROM REQUEST BODY
+# Accepts:
+#   multipart/form-data  → CSV file in field "file"
+#   text/csv             → raw CSV body
+#   application/json     → [{...}, ...] or {"plots": [{...}, ...]}
+# ─────────────────────────────────────────
+async def _read_plots(request: Request) -> pd.DataFrame:
+    content_type = request.headers.get("content-type", "").lower()
+
+    if content_type.startswith("multipart/form-data"):
+        form   = await request.form()
+        upload = form.get("file")
+        if upload is None or isinstance(upload, str):
+            raise HTTPException(status_code=400, detail="Upload the CSV in a form field named 'file'.")
+        return pd.read_csv(io.BytesIO(await upload.read()), dtype=str)
+
+    if "csv" in content_type:
+        return pd.read_csv(io.BytesIO(await request.body()), dtype=str)
+
+    try:
+        payload = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Body must be CSV or JSON.")
+
+    rows = payload.get("plots") if isinstance(payload, dict) else payload
+    if not isinstance(rows, list):
+        raise HTTPException(status_code=400, detail="JSON body must be a list of plots or {\"plots\": [...]}.")
+    return pd.DataFrame.from_records(rows)
+
+
+# ─────────────────────────────────────────
+# POST /api/suitability/batch
+# ─────────────────────────────────────────
+@router.post("/suitability/batch")
+async def suitability_batch(request: Request):
+    """
+    Scores every plot of a Soil Health Card export in one pass.
+
+    Columns (any case): plot_id, crop, ph, soil_ec, phosphorus, potassium,
+    urea, tsp, mop, moisture, temperature. Missing readings use the same
+    defaults as /api/recommend.
+
+    Streams newline-delimited JSON — one line per plot with top_3_crops and
+    top_3_confidence (plus is_suitable / suitability_score if crop is given).
+    """
+    if crop_service.clf is None:
+        raise HTTPException(status_code=503, detail="Crop model unavailable. Check Plant_Parameters.csv")
+
+    try:
+        plots = normalize_soil_frame(await _read_plots(request))
+    except HTTPException:
+        raise
+    except (ValueError, pd.errors.ParserError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if plots.empty:
+        raise HTTPException(status_code=400, detail="No plots found in upload.")
+
+    def _stream():
+        for result in check_crop_suitability_batch(plots):
+            yield json.dumps(result, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(
+        _stream(),
+        media_type = "application/x-ndjson",
+        headers    = {"X-Plot-Count": str(len(plots))}
+    )
+
+
+# ─────────────────────────────────────────
+# POST /api/suitability/rank
+# ─────────────────────────────────────────
+@router.post("/suitability/rank")
+async def suitability_rank(request: SoilSampleRequest):
+    """
+    "What should I plant?" — ranks all profiled crops for one soil sample
+    from a single model call, best match first.
+    """
+    try:
+        result = rank_crops_for_soil(
+            ph          = request.ph,
+            soil_ec     = request.soil_ec,
+            phosphorus  = request.phosphorus,
+            potassium   = request.potassium,
+            urea        = request.urea,
+            tsp         = request.tsp,
+            mop         = request.mop,
+            moisture    = request.moisture,
+            temperature = request.temperature
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    if "error" in result:
+        raise HTTPException(status_code=503, detail=result["error"])
+    return {"success": True, **result}
+
+
+# ─────────────────────────────────────────
+# GET / DELETE /api/suitability/cache
+# ─────────────────────────────────────────
+@router.get("/suitability/cache")
+def suitability_cache():
+    return get_suitability_cache_stats()
+
+
+@router.delete("/suitability/cache")
+def clear_suitability():
+    """Drop memoized predictions — call after retraining / reloading the crop model."""
+    clear_suitability_cache()
+    return {"success": True, **get_suitability_cache_stats()}
@@ -0,0 +1,75 @@
+# backend/routes/weather.py
+#
+# Weather endpoints for the district dashboard
+#   POST /api/weather/batch  — farming weather signals for many districts at once
+#   GET  /api/weather/cache  — weather cache, prefetch and climatology stats
+
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel, Field
+from typing import List
+import sys, os
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from services.weather_service import get_weather_batch_async, get_weather_cache_stats
+
+router = APIRouter()
+
+MAX_BATCH_LOCATIONS = 200
+
+
+# ─────────────────────────────────────────
+# REQUEST MODELS
+# ─────────────────────────────────────────
+class WeatherLocation(BaseModel):
+    district: str = Field(..., example="Pune")
+    state:    str = Field(..., example="Maharashtra")
+
+
+class WeatherBatchRequest(BaseModel):
+    locations:        List[WeatherLocation] = Field(
+        ..., example=[{"district": "Pune", "state": "Maharashtra"},
+                      {"district": "Nashik", "state": "Maharashtra"}]
+    )
+    include_forecast: bool = Field(default=False, example=False)
+
+
+# ─────────────────────────────────────────
+# POST /api/weather/batch
+# ─────────────────────────────────────────
+@router.post("/weather/batch")
+async def weather_batch(request: WeatherBatchRequest):
+    """
+    Current weather and interpreted farming signals (harvest_risk,
+    transit_risk, spoilage_factor) for up to 200 districts in one call.
+
+    Duplicate districts and districts sharing a weather grid cell are
+    fetched once. Cached cells are served straight away; the rest are
+    fetched concurrently within the OpenWeather rate limit. Each result
+    carries "source" (live / cached / climatology / mock) so the
+    dashboard can flag readings that are not live.
+    """
+    if not request.locations:
+        raise HTTPException(status_code=400, detail="Provide at least one location.")
+    if len(request.locations) > MAX_BATCH_LOCATIONS:
+        raise HTTPException(status_code=400,
+                            detail=f"At most {MAX_BATCH_LOCATIONS} locations per request.")
+
+    try:
+        batch = await get_weather_batch_async(
+            [(loc.district, loc.state) for loc in request.locations],
+            include_forecast = request.include_forecast
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return {"success": True, **batch}
+
+
+# ─────────────────────────────────────────
+# GET /api/weather/cache
+# ─────────────────────────────────────────
+@router.get("/weather/cache")
+def weather_cache():
+    """Hit-rate of the weather grid cache, background prefetch activity and climatology size."""
+    return get_weather_cache_stats()
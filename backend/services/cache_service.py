@@ -0,0 +1,309 @@
+# backend/services/cache_service.py
+#
+# Shared in-memory cache for services that front slow upstreams
+# (OpenWeather, OLA Maps, Groq ...)
+#
+#   TTLCache(name, maxsize, ttl)
+#     .get(key)                  → fresh value or None
+#     .set(key, value)
+#     .get_or_load(key, loader)  → concurrent misses on one key share a
+#                                  single loader() call (single-flight)
+#     .aget_or_load(key, loader) → same for an async loader, awaited on
+#                                  one event loop; with stale_ttl set, an
+#                                  expired entry is served while it reloads
+#     .arefresh(key, loader)     → force a reload (background prefetchers)
+#     .stats()                   → hits / misses / stale / coalesced
+#
+# Every cache registers itself by name so /api/cache can report them all.
+# A user request never waits on a load started at http_service BACKGROUND
+# priority (it would inherit that load's long rate-limit wait); it starts
+# its own load instead.
+
+import os
+import sys
+import time
+import asyncio
+import threading
+from collections import OrderedDict
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from services.http_service import PRIORITY, USER
+
+_REGISTRY: dict = {}
+_REGISTRY_LOCK  = threading.Lock()
+
+
+class _Flight:
+    """One in-progress load that late arrivals wait on."""
+    __slots__ = ("event", "value", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class TTLCache:
+    """
+    Bounded, thread-safe LRU cache with per-entry TTL.
+
+    hits         → fresh entry returned
+    misses       → key not cached
+    stale        → key cached but past its TTL
+    stale_served → ...and returned anyway while a reload ran (stale_ttl window)
+    coalesced    → caller waited on another caller's load instead of fetching
+    """
+
+    def __init__(self, name: str, maxsize: int = 1024, ttl: float = 600.0,
+                 stale_ttl: float = 0.0):
+        self.name      = name
+        self.maxsize   = maxsize
+        self.ttl       = ttl
+        self.stale_ttl = stale_ttl
+        self._entries: OrderedDict = OrderedDict()   # key → (stored_at, value)
+        self._inflight: dict       = {}
+        self._ainflight: dict      = {}                # key → (asyncio.Future, background)
+        self._lock    = threading.Lock()
+        self._stats   = {"hits": 0, "misses": 0, "stale": 0, "stale_served": 0,
+                         "coalesced": 0, "evictions": 0, "load_errors": 0}
+
+        with _REGISTRY_LOCK:
+            _REGISTRY[name] = self
+
+    # ── internal helpers (call with self._lock held) ──
+
+    def _lookup(self, key, now: float):
+        """(entry, fresh) — entry is None when missing or past the stale window."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self._stats["misses"] += 1
+            return None, False
+        age = now - entry[0]
+        if age < self.ttl:
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return entry, True
+        self._stats["stale"] += 1
+        if age >= self.ttl + self.stale_ttl:
+            del self._entries[key]
+            return None, False
+        return entry, False
+
+    def _store(self, key, value, now: float) -> None:
+        self._entries[key] = (now, value)
+        self._entries.move_to_end(key)
+        if len(self._entries) <= self.maxsize:
+            return
+        # Full — drop anything already expired before evicting live entries
+        expired = [k for k, (stored_at, _) in self._entries.items()
+                   if now - stored_at >= self.ttl + self.stale_ttl]
+        for k in expired:
+            del self._entries[k]
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+        self._stats["evictions"] += len(expired)
+
+    # ── public API ──
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry, fresh = self._lookup(key, time.time())
+        return entry[1] if fresh else default
+
+    def age(self, key):
+        """Seconds since key was stored, or None. Does not touch stats / LRU order."""
+        with self._lock:
+            entry = self._entries.get(key)
+        return None if entry is None else time.time() - entry[0]
+
+    def set(self, key, value, stored_at: float = None) -> None:
+        """stored_at lets a persisted entry keep its original age when reloaded."""
+        with self._lock:
+            self._store(key, value, stored_at or time.time())
+
+    def get_or_load(self, key, loader):
+        """
+        Returns the cached value for key, or calls loader() once to fill it.
+        Threads that miss while a load is running wait for that result
+        (or its exception) instead of calling the upstream themselves.
+        """
+        with self._lock:
+            entry, fresh = self._lookup(key, time.time())
+            if fresh:
+                return entry[1]
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+            else:
+                self._stats["coalesced"] += 1
+
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = loader()
+            with self._lock:
+                self._store(key, flight.value, time.time())
+            return flight.value
+        except Exception as e:
+            flight.error = e
+            with self._lock:
+                self._stats["load_errors"] += 1
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.event.set()
+
+    async def aget_or_load(self, key, loader):
+        """
+        Async single-flight: loader is a zero-arg coroutine function.
+        All callers must share one event loop (waiters await the leader's future).
+        Within the stale_ttl window the old value is returned at once and the
+        reload runs in the background (stale-while-revalidate).
+        """
+        with self._lock:
+            entry, fresh = self._lookup(key, time.time())
+            if fresh:
+                return entry[1]
+            if entry is not None:
+                # Serve the old value; reload unless a reload is already running
+                self._stats["stale_served"] += 1
+                if key in self._ainflight:
+                    return entry[1]
+            future, leader = self._aflight(key)
+            if entry is None and not leader:
+                self._stats["coalesced"] += 1
+
+        if entry is not None:
+            asyncio.ensure_future(self._aload_quietly(key, loader, future))
+            return entry[1]
+        if not leader:
+            return await self._ajoin(future, lambda: self.aget_or_load(key, loader))
+        return await self._aload(key, loader, future)
+
+    async def arefresh(self, key, loader):
+        """Reload key now regardless of age; joins a reload already in flight."""
+        with self._lock:
+            future, leader = self._aflight(key)
+        if not leader:
+            return await self._ajoin(future, lambda: self.arefresh(key, loader))
+        return await self._aload(key, loader, future)
+
+    def _aflight(self, key):
+        """
+        (future, leader) for an async load of key. Call with self._lock held.
+        Joins the load in flight unless that one runs at BACKGROUND priority
+        and this caller doesn't — then this caller leads a load of its own.
+        """
+        background = PRIORITY.get() != USER
+        current    = self._ainflight.get(key)
+        if current is not None and (background or not current[1]):
+            return current[0], False
+        future = asyncio.get_running_loop().create_future()
+        self._ainflight[key] = (future, background)
+        return future, True
+
+    @staticmethod
+    async def _ajoin(future, retry):
+        """Wait for the leader's load; if the leader was cancelled, take over."""
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            if future.cancelled():      # leader's client went away — this caller didn't
+                return await retry()
+            raise
+
+    async def _aload(self, key, loader, future):
+        try:
+            value = await loader()
+            with self._lock:
+                self._store(key, value, time.time())
+            future.set_result(value)
+            return value
+        except Exception as e:
+            with self._lock:
+                self._stats["load_errors"] += 1
+            future.set_exception(e)
+            future.exception()          # mark retrieved — the leader re-raises it
+            raise
+        finally:
+            # Cancelled (client disconnect, deadline): release coalesced waiters
+            if not future.done():
+                future.cancel()
+            with self._lock:
+                if self._ainflight.get(key, (None,))[0] is future:
+                    del self._ainflight[key]
+
+    async def _aload_quietly(self, key, loader, future):
+        try:
+            await self._aload(key, loader, future)
+        except Exception:
+            pass                        # already counted; stale value stays until it ages out
+
+    def invalidate(self, key) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            for k in self._stats:
+                self._stats[k] = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            size  = len(self._entries)
+            inflight = len(self._inflight) + len(self._ainflight)
+        lookups = stats["hits"] + stats["misses"] + stats["stale"]
+        return {
+            "name":         self.name,
+            "size":         size,
+            "max_size":     self.maxsize,
+            "ttl_seconds":  self.ttl,
+            "stale_ttl_seconds": self.stale_ttl,
+            "inflight":     inflight,
+            **stats,
+            "hit_rate_pct": round(stats["hits"] / lookups * 100, 1) if lookups else 0.0
+        }
+
+
+def get_all_cache_stats() -> dict:
+    """Stats for every TTLCache created in this process, keyed by name."""
+    with _REGISTRY_LOCK:
+        caches = list(_REGISTRY.values())
+    return {cache.name: cache.stats() for cache in caches}
+
+
+# ─────────────────────────────────────────
+# QUICK TEST — python cache_service.py
+# ─────────────────────────────────────────
+if __name__ == "__main__":
+    from concurrent.futures import ThreadPoolExecutor
+
+    calls = []
+
+    def slow_fetch():
+        calls.append(1)
+        time.sleep(0.2)
+        return {"temperature": 31.0}
+
+    cache = TTLCache("demo", maxsize=2, ttl=0.5)
+    with ThreadPoolExecutor(max_workers=20) as pool:
+        results = list(pool.map(lambda _: cache.get_or_load("pune", slow_fetch), range(20)))
+
+    print(f"20 concurrent misses → {len(calls)} upstream call(s)")
+    print(f"After burst : {cache.stats()}")
+    time.sleep(0.6)
+    cache.get_or_load("pune", slow_fetch)
+    print(f"After expiry: {cache.stats()}")
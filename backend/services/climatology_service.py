@@ -0,0 +1,208 @@
+# backend/services/climatology_service.py
+#
+# Local weather climatology — the offline fallback for weather_service
+#
+#   record_observation(lat, lon, ...)  → every live OpenWeather reading is
+#                                        appended to data/weather/observations.csv
+#   lookup_climatology(lat, lon, when) → typical conditions for that place and
+#                                        ISO week, from running per-cell sums
+#
+# Aggregates live in memory as [count, Σtemp, Σhumidity, Σrain, Σwind] per
+# (cell, week) — the weather cache's WEATHER_GRID_DEG cells, with 1° regions
+# as a coarser fallback — so a lookup is a handful of dict hits. The CSV is
+# only read once at startup; new readings are appended by a background flush.
+
+import os
+import sys
+import time
+import atexit
+import threading
+import numpy as np
+import pandas as pd
+from datetime import datetime
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from services.geo_service import grid_cell
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+OBSERVATIONS_PATH = os.getenv(
+    "CLIMATOLOGY_PATH",
+    os.path.join(BASE_DIR, "../data/weather/observations.csv")
+)
+
+CELL_DEG      = float(os.getenv("WEATHER_GRID_DEG", "0.1"))   # same cells as the weather cache
+REGION_DEG    = 1.0     # coarse fallback cell
+FLUSH_ROWS    = 20      # buffered observations that trigger an append right away
+FLUSH_SECONDS = 300     # otherwise appended at most this long after a reading
+COLUMNS       = ["ts", "lat", "lon", "temperature", "humidity", "rainfall_mm", "wind_speed_ms"]
+
+_cells: dict   = {}     # (row, col, week) → np.array([n, Σt, Σh, Σr, Σw])
+_regions: dict = {}
+_buffer: list  = []
+_lock          = threading.Lock()
+_write_lock    = threading.Lock()   # one CSV append at a time (header written once)
+_flush_timer   = None               # pending background append, if any
+
+
+def _week(ts: float) -> int:
+    return datetime.fromtimestamp(ts).isocalendar()[1]
+
+
+def _add(table: dict, key: tuple, values: np.ndarray) -> None:
+    current = table.get(key)
+    if current is None:
+        table[key] = values.copy()
+    else:
+        current += values
+
+
+# ─────────────────────────────────────────
+# LOAD STORED OBSERVATIONS ONCE AT STARTUP
+# ─────────────────────────────────────────
+def _load() -> int:
+    try:
+        df = pd.read_csv(OBSERVATIONS_PATH)
+    except FileNotFoundError:
+        return 0
+    except (OSError, ValueError, pd.errors.ParserError) as e:
+        print(f"⚠️ Could not read climatology store ({e}). Starting empty.")
+        return 0
+    if df.empty:
+        return 0
+
+    # Local-time weeks, same as record_observation / lookup_climatology
+    df["week"] = pd.to_datetime(df["ts"] - time.timezone, unit="s").dt.isocalendar().week.astype(int)
+    for deg, table in ((CELL_DEG, _cells), (REGION_DEG, _regions)):
+        # np.rint rounds half to even, like grid_cell's round()
+        df["row"] = np.rint(df["lat"] / deg).astype(int)
+        df["col"] = np.rint(df["lon"] / deg).astype(int)
+        sums = df.groupby(["row", "col", "week"])[COLUMNS[3:]].agg(["count", "sum"])
+        for key, row in zip(sums.index, sums.to_numpy()):
+            # row = [cnt_t, Σt, cnt_h, Σh, cnt_r, Σr, cnt_w, Σw]
+            table[tuple(int(k) for k in key)] = np.array([row[0], row[1], row[3], row[5], row[7]], dtype=float)
+    return len(df)
+
+
+_loaded = _load()
+print(f"✅ Climatology store loaded: {_loaded:,} observations, {len(_cells)} cell-weeks")
+
+
+# ─────────────────────────────────────────
+# RECORD
+# ─────────────────────────────────────────
+def flush() -> None:
+    """Append buffered observations to the CSV store."""
+    global _flush_timer
+    with _write_lock:
+        with _lock:
+            rows, _buffer[:] = list(_buffer), []
+            _flush_timer = None
+        if not rows:
+            return
+        try:
+            os.makedirs(os.path.dirname(OBSERVATIONS_PATH), exist_ok=True)
+            write_header = not os.path.exists(OBSERVATIONS_PATH)
+            pd.DataFrame(rows, columns=COLUMNS).to_csv(
+                OBSERVATIONS_PATH, mode="a", header=write_header, index=False
+            )
+        except OSError as e:
+            print(f"⚠️ Could not save weather observations: {e}")
+
+atexit.register(flush)
+
+
+def record_observation(lat: float, lon: float, temperature: float, humidity: float,
+                       rainfall_mm: float, wind_speed_ms: float, ts: float = None) -> None:
+    """
+    Add one live reading to the climatology (called by weather_service).
+    The CSV append happens on a background timer, never on the caller's thread.
+    """
+    global _flush_timer
+    ts     = ts or time.time()
+    week   = _week(ts)
+    values = np.array([1.0, temperature, humidity, rainfall_mm, wind_speed_ms])
+
+    with _lock:
+        _add(_cells,   (*grid_cell(lat, lon, CELL_DEG),   week), values)
+        _add(_regions, (*grid_cell(lat, lon, REGION_DEG), week), values)
+        _buffer.append([int(ts), round(lat, 4), round(lon, 4), round(temperature, 1),
+                        round(humidity), round(rainfall_mm, 2), round(wind_speed_ms, 1)])
+        full = len(_buffer) >= FLUSH_ROWS
+        if full and _flush_timer is not None and _flush_timer.interval > 0:
+            _flush_timer.cancel()           # buffer is full — don't wait out the timer
+            _flush_timer = None
+        if _flush_timer is None:
+            _flush_timer = threading.Timer(0 if full else FLUSH_SECONDS, flush)
+            _flush_timer.daemon = True
+            _flush_timer.start()
+
+
+# ─────────────────────────────────────────
+# LOOKUP
+# Most specific match first:
+#   cell, same week → cell, ±1 week → 1° region, ±1 week
+# ─────────────────────────────────────────
+def _neighbour_weeks(week: int) -> list:
+    return [week, (week - 2) % 53 + 1, week % 53 + 1]
+
+
+def lookup_climatology(lat: float, lon: float, when: datetime = None):
+    """
+    Typical weather for a location in the ISO week of `when` (default now).
+    Returns None if nothing has ever been observed nearby.
+    """
+    week   = (when or datetime.now()).isocalendar()[1]
+    cell   = grid_cell(lat, lon, CELL_DEG)
+    region = grid_cell(lat, lon, REGION_DEG)
+
+    for level, table, key, weeks in (
+        ("cell_week",     _cells,   cell,   [week]),
+        ("cell_season",   _cells,   cell,   _neighbour_weeks(week)),
+        ("region_season", _regions, region, _neighbour_weeks(week)),
+    ):
+        with _lock:
+            found = [table[(*key, w)] for w in weeks if (*key, w) in table]
+        if found:
+            n, t, h, r, w = np.sum(found, axis=0).tolist()
+            return {
+                "temperature":   round(t / n, 1),
+                "humidity":      round(h / n),
+                "rainfall_mm":   round(r / n, 2),
+                "wind_speed_ms": round(w / n, 1),
+                "samples":       int(n),
+                "level":         level,
+                "week":          week
+            }
+    return None
+
+
+def get_climatology_stats() -> dict:
+    with _lock:
+        return {
+            "cell_weeks":   len(_cells),
+            "region_weeks": len(_regions),
+            "observations": int(sum(v[0] for v in _cells.values())),
+            "buffered":     len(_buffer)
+        }
+
+
+# ─────────────────────────────────────────
+# QUICK TEST — python climatology_service.py
+# ─────────────────────────────────────────
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    for day in range(60):
+        ts = time.time() - day * 86400
+        record_observation(18.52, 73.86, 30 + rng.normal(0, 2), 70 + rng.normal(0, 5),
+                           max(0.0, rng.normal(0.5, 1)), 3.0, ts=ts)
+
+    print(f"  Pune       : {lookup_climatology(18.52, 73.86)}")
+    print(f"  Near Pune  : {lookup_climatology(18.80, 73.60)}")
+    print(f"  Nagpur     : {lookup_climatology(21.15, 79.09)}")
+    print(f"  {get_climatology_stats()}")
+
+    start = time.perf_counter()
+    for _ in range(10_000):
+        lookup_climatology(18.52, 73.86)
+    print(f"  {(time.perf_counter() - start) / 10_000 * 1e6:.1f} µs per lookup")
@@ -6,10 +6,16 @@
 # Contains:
 #   CROP_PROFILES         → shelf life, storage data for 77 crops
 #   CROP_TO_DATASET_MAP   → maps mandi crops to ML model's 10 known crops
+#   CROP_ALIASES          → regional / transliterated / mandi names per crop
 #
 # Based on ICAR + FAO post-harvest storage guidelines
 # To add a new crop: just add a new entry to CROP_PROFILES
 
+import re
+import difflib
+import unicodedata
+from functools import lru_cache
+
 
 
 
@@ -433,6 +439,101 @@ CROP_PROFILES = {
 
 
 
+# CROP NAME ALIASES
+# Regional, transliterated and Agmarknet mandi spellings → CROP_PROFILES key
+# Covers voice input in Hindi / Marathi (and common Telugu, Tamil, Kannada)
+# To add a spelling: append it to the crop's list — case and punctuation ignored
+
+CROP_ALIASES = {
+    # Vegetables
+    "Tomato":        ["tamatar", "tamater", "tomatoes", "टमाटर", "टोमॅटो", "टोमाटो", "టమాటా", "தக்காளி", "ಟೊಮೆಟೊ"],
+    "Onion":         ["pyaz", "pyaaz", "kanda", "onions", "प्याज", "प्याज़", "कांदा", "ఉల్లిపాయ", "வெங்காயம்", "ಈರುಳ್ಳಿ"],
+    "Potato":        ["aloo", "alu", "batata", "potatoes", "आलू", "बटाटा", "బంగాళాదుంప", "உருளைக்கிழங்கு", "ಆಲೂಗಡ್ಡೆ"],
+    "Eggplant":      ["brinjal", "baingan", "bengan", "vangi", "vange", "बैंगन", "वांगी", "वांगे", "వంకాయ", "கத்தரிக்காய்", "ಬದನೆಕಾಯಿ"],
+    "Okra":          ["bhindi", "bhendi", "ladies finger", "lady finger", "bhindi ladies finger", "भिंडी", "भेंडी", "బెండకాయ", "வெண்டைக்காய்", "ಬೆಂಡೆಕಾಯಿ"],
+    "Chili":         ["chilli", "chillies", "chilly", "green chilli", "dry chillies", "mirchi", "mirch", "हरी मिर्च", "मिर्च", "मिरची", "పచ్చిమిర్చి", "மிளகாய்", "ಮೆಣಸಿನಕಾಯಿ"],
+    "Capsicum":      ["shimla mirch", "bell pepper", "dhobli mirchi", "शिमला मिर्च", "ढोबळी मिरची"],
+    "Spinach":       ["palak", "पालक", "పాలకూర", "பசலைக்கீரை", "ಪಾಲಕ್"],
+    "Coriander":     ["dhania", "dhaniya", "kothimbir", "coriander leaves", "धनिया", "कोथिंबीर", "కొత్తిమీర", "கொத்தமல்லி", "ಕೊತ್ತಂಬರಿ"],
+    "Fenugreek":     ["methi", "methi leaves", "मेथी"],
+    "Bitter Gourd":  ["karela", "karle", "bittergourd", "करेला", "कारले", "కాకరకాయ", "பாகற்காய்", "ಹಾಗಲಕಾಯಿ"],
+    "Bottle Gourd":  ["lauki", "ghiya", "dudhi", "doodhi", "bottlegourd", "लौकी", "दुधी", "సొరకాయ", "சுரைக்காய்"],
+    "Ridge Gourd":   ["turai", "tori", "dodka", "ridgeguard tori", "ridgeguard", "तुरई", "दोडका", "బీరకాయ", "பீர்க்கங்காய்"],
+    "Snake Gourd":   ["chichinda", "padwal", "snakeguard", "पडवळ", "చిచిండా", "పొట్లకాయ", "புடலங்காய்"],
+    "Cucumber":      ["kheera", "khira", "kakdi", "cucumbar kheera", "cucumbar", "खीरा", "काकडी", "దోసకాయ", "வெள்ளரிக்காய்"],
+    "Pumpkin":       ["kaddu", "lal bhopla", "कद्दू", "भोपळा", "గుమ్మడికాయ", "பூசணிக்காய்"],
+    "Ash Gourd":     ["petha", "ashgourd", "kohla", "पेठा", "कोहळा"],
+    "Drumstick":     ["sahjan", "moringa", "shevga", "सहजन", "शेवगा", "మునగకాయ", "முருங்கைக்காய்", "ನುಗ್ಗೆಕಾಯಿ"],
+    "Cluster Beans": ["guar", "gawar", "ग्वार", "गवार"],
+    "French Beans":  ["beans", "farasbi", "फरसबी"],
+    "Peas":          ["matar", "green peas", "vatana", "मटर", "वाटाणा"],
+    "Cabbage":       ["patta gobi", "band gobi", "kobi", "पत्ता गोभी", "पत्तागोभी", "कोबी"],
+    "Cauliflower":   ["phool gobi", "gobi", "fulkobi", "फूलगोभी", "फूल गोभी", "फुलकोबी"],
+    "Carrot":        ["gajar", "गाजर"],
+    "Radish":        ["mooli", "muli", "mula", "raddish", "मूली", "मुळा"],
+    "Beetroot":      ["chukandar", "beet", "चुकंदर"],
+    "Turnip":        ["shalgam", "शलगम"],
+    "Sweet Potato":  ["shakarkand", "ratale", "शकरकंद", "रताळे"],
+    "Garlic":        ["lahsun", "lasun", "lehsun", "लहसुन", "लसूण", "వెల్లుల్లి", "பூண்டு"],
+    "Ginger":        ["adrak", "ale", "ginger green", "अदरक", "आले", "అల్లం", "இஞ்சி"],
+    "Turmeric":      ["haldi", "halad", "हल्दी", "हळद", "పసుపు", "மஞ்சள்"],
+
+    # Fruits
+    "Banana":        ["kela", "keli", "banana green", "केला", "केळी", "అరటి", "வாழைப்பழம்", "ಬಾಳೆಹಣ್ಣು"],
+    "Mango":         ["aam", "amba", "mango raw ripe", "आम", "आंबा", "మామిడి", "மாம்பழம்", "ಮಾವು"],
+    "Papaya":        ["papita", "पपीता", "पपई"],
+    "Guava":         ["amrood", "amrud", "peru", "अमरूद", "पेरू", "జామ", "கொய்யா"],
+    "Watermelon":    ["tarbuz", "tarbooj", "kalingad", "water melon", "तरबूज", "कलिंगड"],
+    "Muskmelon":     ["kharbuja", "kharbooja", "karbuj", "खरबूजा", "खरबूज"],
+    "Grapes":        ["angoor", "draksh", "grape", "अंगूर", "द्राक्ष", "ద్రాక్ష", "திராட்சை"],
+    "Pomegranate":   ["anar", "dalimb", "अनार", "डाळिंब", "దానిమ్మ", "மாதுளை"],
+    "Orange":        ["santra", "santara", "narangi", "संतरा", "संत्री"],
+    "Lemon":         ["nimbu", "limbu", "नींबू", "लिंबू"],
+    "Lime":          ["kagzi nimbu", "mousambi sweet lime", "mosambi", "sweet lime", "मोसंबी"],
+    "Coconut":       ["nariyal", "naral", "नारियल", "नारळ", "కొబ్బరి", "தேங்காய்"],
+    "Pineapple":     ["ananas", "अनानास"],
+    "Sapota":        ["chikoo", "chiku", "चीकू", "चिकू"],
+    "Custard Apple": ["sitaphal", "sharifa", "custard apple sharifa", "सीताफल", "शरीफा"],
+    "Jackfruit":     ["kathal", "phanas", "jack fruit", "कटहल", "फणस"],
+    "Amla":          ["aonla", "awla", "amla nelli kai", "आंवला", "आवळा"],
+    "Tamarind":      ["imli", "chinch", "tamarind fruit", "इमली", "चिंच"],
+    "Strawberries":  ["strawberry", "स्ट्रॉबेरी"],
+
+    # Grains
+    "Rice":          ["chawal", "paddy", "dhan", "paddy dhan common", "bhaat", "चावल", "धान", "तांदूळ", "भात", "వరి", "அரிசி"],
+    "Wheat":         ["gehu", "gehun", "gahu", "गेहूं", "गेहूँ", "गहू"],
+    "Maize":         ["makka", "makai", "maka", "मक्का", "मका"],
+    "Sorghum":       ["jowar", "jwari", "jowar sorghum", "ज्वार", "ज्वारी"],
+    "Bajra":         ["pearl millet", "bajri", "bajra pearl millet cumbu", "बाजरा", "बाजरी"],
+    "Barley":        ["jau", "barley jau", "जौ"],
+
+    # Pulses
+    "Chickpea":      ["chana", "gram", "bengal gram", "harbhara", "bengal gram gram whole", "चना", "हरभरा"],
+    "Lentil":        ["masoor", "masur", "lentil masur whole", "मसूर"],
+    "Pigeon Pea":    ["arhar", "tur", "toor", "red gram", "arhar tur red gram whole", "अरहर", "तूर"],
+    "Black Gram":    ["urad", "urd", "black gram urd beans whole", "उड़द", "उडद", "उडीद"],
+    "Green Gram":    ["moong", "mung", "green gram moong whole", "मूंग", "मूग"],
+    "Soybean":       ["soyabean", "soya", "सोयाबीन"],
+
+    # Oilseeds & Cash Crops
+    "Cotton":        ["kapas", "kapus", "कपास", "कापूस"],
+    "Sunflowers":    ["sunflower", "surajmukhi", "सूरजमुखी"],
+    "Groundnut":     ["peanut", "moongfali", "mungfali", "shengdana", "भुईमूग", "मूंगफली", "వేరుశెనగ", "நிலக்கடலை"],
+    "Sesame":        ["til", "sesamum", "gingelly", "sesamum sesame gingelly til", "तिल", "तीळ"],
+    "Mustard":       ["sarson", "rai", "mohari", "सरसों", "मोहरी"],
+    "Jute":          ["patsan", "पटसन"],
+    "Sugarcane":     ["ganna", "oos", "गन्ना", "ऊस"],
+
+    # Spices
+    "Cinnamon":      ["dalchini", "दालचीनी"],
+    "Pepper":        ["kali mirch", "black pepper", "miri", "काली मिर्च", "मिरी"],
+    "Cardamom":      ["elaichi", "cardamoms", "velchi", "इलायची", "वेलची"],
+    "Cumin":         ["jeera", "jira", "cumin seed jeera", "cumin seed", "जीरा", "जिरे"],
+    "Coriander Seeds": ["dhania seed", "dhaniya seeds", "coriander seed", "धनिया बीज"],
+}
+
+
+
 # CROP TO DATASET MAP
 # Maps mandi crops → nearest ML model crop
 # ML model knows only 10 crops from dataset:
@@ -537,18 +638,67 @@ CROP_TO_DATASET_MAP = {
 
 
 
+# ALIAS INDEX
+# Built once at import: normalized name → canonical CROP_PROFILES key.
+# Exact lookups are a dict hit; misspellings fall back to a cached
+# fuzzy match against the same keys.
+
+FUZZY_CUTOFF = 0.82
+
+
+def normalize_crop_name(name: str) -> str:
+    """Lowercase, NFC-normalize, and collapse punctuation/brackets to single spaces."""
+    text = unicodedata.normalize("NFC", str(name)).lower()
+    return " ".join(re.sub(r"[\s\-_.,;:()\[\]/&'\"]+", " ", text).split())
+
+
+def _build_alias_index() -> dict:
+    index = {}
+    for canonical in list(CROP_PROFILES) + list(CROP_TO_DATASET_MAP):
+        if canonical != "Default":
+            index.setdefault(normalize_crop_name(canonical), canonical)
+    for canonical, aliases in CROP_ALIASES.items():
+        for alias in aliases:
+            index.setdefault(normalize_crop_name(alias), canonical)
+    return index
+
+CROP_ALIAS_INDEX = _build_alias_index()
+_ALIAS_KEYS      = list(CROP_ALIAS_INDEX)
+
+
+@lru_cache(maxsize=4096)
+def _fuzzy_crop_name(key: str):
+    match = difflib.get_close_matches(key, _ALIAS_KEYS, n=1, cutoff=FUZZY_CUTOFF)
+    return CROP_ALIAS_INDEX[match[0]] if match else None
+
+
+def resolve_crop_name(crop: str) -> str:
+    """
+    Any crop name (English, Hindi, Marathi, transliterated, Agmarknet spelling)
+    → canonical CROP_PROFILES key. Unknown names come back title-cased.
+    """
+    key = normalize_crop_name(crop)
+    if not key:
+        return ""
+    canonical = CROP_ALIAS_INDEX.get(key)
+    if canonical is None:
+        canonical = _fuzzy_crop_name(key)
+    return canonical or str(crop).strip().title()
+
+
+
 # HELPER — GET PROFILE
 # Returns profile for a crop,
 # falls back to Default if not found
 
 def get_crop_profile(crop: str) -> dict:
     """Returns crop profile, falling back to Default if crop not found."""
-    return CROP_PROFILES.get(crop.strip().title(), CROP_PROFILES["Default"])
+    return CROP_PROFILES.get(resolve_crop_name(crop), CROP_PROFILES["Default"])
 
 
 def get_model_crop(crop: str) -> str:
     """Maps any crop to its nearest ML model equivalent."""
-    return CROP_TO_DATASET_MAP.get(crop.strip().title(), "Tomato")
+    return CROP_TO_DATASET_MAP.get(resolve_crop_name(crop), "Tomato")
 
 
 
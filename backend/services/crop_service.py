@@ -7,8 +7,11 @@
 # Place at: backend/data/soil/Plant_Parameters.csv
 
 import os
+import bisect
 import pickle
+import threading
 import warnings
+from collections import OrderedDict
 import numpy as np
 import pandas as pd
 from sklearn.ensemble import RandomForestClassifier
@@ -36,23 +39,28 @@ ENCODER_PATH = os.path.join(BASE_DIR, "..", "models", "crop_label_encoder.pkl")
 
 
 # MICRONUTRIENT DEFICIENCY DATA
-# From your 650-row district dataset
-# Zn, Fe, Cu, Mn, B, S deficiency %
-
-MICRONUTRIENT_DATA = {
-    "Anantapur":     {"Zn": 67.67, "Fe": 65.14, "Cu": 91.88, "Mn": 77.70, "B": 73.54, "S": 85.90},
-    "Chittoor":      {"Zn": 80.51, "Fe": 78.19, "Cu": 99.77, "Mn": 91.82, "B": 89.04, "S": 88.62},
-    "East Godavari": {"Zn": 79.27, "Fe": 88.14, "Cu": 95.54, "Mn": 97.24, "B": 88.05, "S": 95.67},
-    "Guntur":        {"Zn": 58.30, "Fe": 71.16, "Cu": 98.86, "Mn": 91.40, "B": 86.15, "S": 86.81},
-    "Krishna":       {"Zn": 78.62, "Fe": 82.02, "Cu": 98.05, "Mn": 95.23, "B": 65.78, "S": 98.56},
-    "Kurnool":       {"Zn": 60.70, "Fe": 48.45, "Cu": 97.47, "Mn": 91.34, "B": 92.75, "S": 96.05},
-    "Prakasam":      {"Zn": 40.66, "Fe": 59.14, "Cu": 94.65, "Mn": 82.17, "B": 73.99, "S": 69.54},
-    "Nellore":       {"Zn": 39.58, "Fe": 55.37, "Cu": 80.72, "Mn": 79.83, "B": 77.23, "S": 87.61},
-    "Srikakulam":    {"Zn": 81.05, "Fe": 75.77, "Cu": 98.85, "Mn": 91.31, "B": 96.76, "S": 94.45},
-    "Visakhapatnam": {"Zn": 58.75, "Fe": 64.93, "Cu": 96.44, "Mn": 78.35, "B": 85.40, "S": 88.29},
-    "Vizianagaram":  {"Zn": 61.60, "Fe": 93.71, "Cu": 95.22, "Mn": 98.34, "B": 79.43, "S": 87.59},
-    "West Godavari": {"Zn": 67.36, "Fe": 87.69, "Cu": 96.54, "Mn": 96.76, "B": 87.74, "S": 88.24},
-    "Y.S.R.":        {"Zn": 68.61, "Fe": 67.42, "Cu": 92.82, "Mn": 92.72, "B": 71.80, "S": 86.46},
+# From the district soil-testing dataset (Zn, Fe, Cu, Mn, B, S deficiency %)
+# Place at: backend/data/soil/micronutrient_deficiency.csv
+# Columns: State, District, Zn, Fe, Cu, Mn, B, S — one row per district,
+# or several rows (mandal / block level) which are averaged per district.
+# Districts are keyed by (State, District): Aurangabad, Bilaspur, Hamirpur …
+# exist in more than one state
+
+MICRONUTRIENT_PATH = os.path.join(BASE_DIR, "..", "data", "soil", "micronutrient_deficiency.csv")
+
+# Old names, short forms and common misspellings → district name in the dataset
+DISTRICT_ALIASES = {
+    "Y.S.R.":        ["Kadapa", "Cuddapah", "YSR Kadapa", "Y.S.R. Kadapa"],
+    "Nellore":       ["Sri Potti Sriramulu Nellore", "SPSR Nellore", "S.P.S.R. Nellore"],
+    "Visakhapatnam": ["Vizag", "Vishakhapatnam", "Vishakapatnam", "Visakha"],
+    "Anantapur":     ["Anantapuramu", "Ananthapur", "Ananthapuramu"],
+    "Chittoor":      ["Chitoor", "Chittor"],
+    "Kurnool":       ["Karnool"],
+    "East Godavari": ["E. Godavari", "E Godavari", "Kakinada"],
+    "West Godavari": ["W. Godavari", "W Godavari", "Eluru"],
+    "Krishna":       ["Machilipatnam"],
+    "Prakasam":      ["Ongole"],
+    "Vizianagaram":  ["Vizianagram", "Vizayanagaram"],
 }
 
 NUTRIENT_NAMES = {"Zn": "Zinc", "Fe": "Iron", "Cu": "Copper",
@@ -70,6 +78,121 @@ NUTRIENT_FIXES = {
 DEFICIENCY_THRESHOLD = 70.0
 
 
+# MICRONUTRIENT INDEX
+# Built once at startup: every district's warnings are precomputed,
+# then reachable by exact name, alias or prefix (any word in the name).
+# A name maps to {state: result}; the caller's state picks between
+# same-named districts
+
+def _normalize_district(name: str) -> str:
+    cleaned = "".join(ch if ch.isalnum() else " " for ch in str(name).lower())
+    return " ".join(cleaned.replace("district", " ").split())
+
+
+def _build_micronutrient_result(district: str, data: dict) -> dict:
+    warnings_list = []
+    for nutrient, pct in data.items():
+        if pct >= DEFICIENCY_THRESHOLD:
+            severity = "High" if pct >= 85 else "Medium"
+            warnings_list.append({
+                "nutrient":       NUTRIENT_NAMES[nutrient],
+                "deficiency_pct": pct,
+                "severity":       severity,
+                "fix":            NUTRIENT_FIXES[nutrient]
+            })
+
+    warnings_list.sort(key=lambda x: (
+        -{"High": 2, "Medium": 1}.get(x["severity"], 0),
+        -x["deficiency_pct"]
+    ))
+
+    if warnings_list:
+        top     = warnings_list[0]
+        summary = (f"⚠️ {len(warnings_list)} micronutrient deficiencies in "
+                   f"{district}. Most critical: {top['nutrient']} "
+                   f"({top['deficiency_pct']}% farms deficient).")
+    else:
+        summary = f"✅ No critical micronutrient deficiencies in {district}."
+
+    return {
+        "district":  district,
+        "warnings":  warnings_list,
+        "summary":   summary,
+        "available": True
+    }
+
+
+def _load_micronutrient_index():
+    if not os.path.exists(MICRONUTRIENT_PATH):
+        print(f"❌ Micronutrient dataset not found: {MICRONUTRIENT_PATH}")
+        return {}, {}, []
+
+    df = pd.read_csv(MICRONUTRIENT_PATH)
+    df.columns = df.columns.str.strip()
+    nutrients  = [n for n in NUTRIENT_NAMES if n in df.columns]
+    if "State" not in df.columns:
+        df["State"] = ""
+    df["State"]    = df["State"].fillna("").astype(str).str.strip()
+    df["District"] = df["District"].astype(str).str.strip()
+    district_avg   = df.groupby(["State", "District"], sort=False)[nutrients].mean().round(2)
+
+    data, results, prefixes = {}, {}, []
+    for (state, district), row in district_avg.iterrows():
+        data[(state, district)] = {n: float(row[n]) for n in nutrients if pd.notna(row[n])}
+        result          = _build_micronutrient_result(district, data[(state, district)])
+        result["state"] = state
+        results.setdefault(_normalize_district(district), {})[_normalize_district(state)] = result
+
+    # Aliases point at the same precomputed result objects
+    for district, aliases in DISTRICT_ALIASES.items():
+        key = _normalize_district(district)
+        if key in results:
+            for alias in aliases:
+                results.setdefault(_normalize_district(alias), results[key])
+
+    # Prefix index over every word-start of every name: "godavari" → East Godavari
+    for key in results:
+        words = key.split()
+        for i in range(len(words)):
+            prefixes.append((" ".join(words[i:]), key))
+    prefixes.sort()
+
+    print(f"✅ Micronutrient data loaded: {len(data)} districts")
+    return data, results, prefixes
+
+MICRONUTRIENT_DATA, _MICRO_RESULTS, _MICRO_PREFIXES = _load_micronutrient_index()
+_MICRO_PREFIX_KEYS = [p for p, _ in _MICRO_PREFIXES]
+
+
+# SOIL FEATURES
+# Column order the RandomForest was trained on,
+# plus the defaults /api/recommend uses when a reading is missing
+
+SOIL_FEATURES = ["pH", "Soil EC", "Phosphorus", "Potassium",
+                 "Urea", "T.S.P", "M.O.P", "Moisture", "Temperature"]
+
+SOIL_DEFAULTS = {
+    "pH": 6.5,        "Soil EC": 0.6,  "Phosphorus": 20.0,
+    "Potassium": 150.0, "Urea": 50.0,  "T.S.P": 22.0,
+    "M.O.P": 30.0,    "Moisture": 68.0, "Temperature": 72.0
+}
+
+# Soil Health Card exports and API clients use different headers
+# for the same reading — all are folded onto SOIL_FEATURES
+SOIL_FIELD_ALIASES = {
+    "ph": "pH",
+    "soil_ec": "Soil EC", "soil ec": "Soil EC", "ec": "Soil EC",
+    "phosphorus": "Phosphorus", "p": "Phosphorus",
+    "potassium": "Potassium",   "k": "Potassium",
+    "urea": "Urea",             "n": "Urea",
+    "tsp": "T.S.P",  "t.s.p": "T.S.P",
+    "mop": "M.O.P",  "m.o.p": "M.O.P",
+    "moisture": "Moisture",
+    "temperature": "Temperature", "temp": "Temperature",
+    "plot_id": "plot_id", "plot": "plot_id", "id": "plot_id",
+    "crop": "crop",
+}
+
 
 # TRAIN MODEL
 
@@ -80,12 +203,10 @@ def train_crop_model() -> bool:
         print(f"❌ Dataset not found: {DATA_PATH}")
         return False
 
-    df           = pd.read_csv(DATA_PATH)
-    df.columns   = df.columns.str.strip()
-    feature_cols = ["pH", "Soil EC", "Phosphorus", "Potassium",
-                    "Urea", "T.S.P", "M.O.P", "Moisture", "Temperature"]
+    df         = pd.read_csv(DATA_PATH)
+    df.columns = df.columns.str.strip()
 
-    X         = df[feature_cols]
+    X         = df[SOIL_FEATURES]
     y         = df["Plant Type"]
     encoder   = LabelEncoder()
     y_encoded = encoder.fit_transform(y)
@@ -126,6 +247,102 @@ def _load_model():
 
 clf, encoder = _load_model()
 
+
+# CROP → MODEL CLASS INDEX
+# Every profiled crop resolved once to its column in predict_proba output,
+# so one model call can be broadcast to all 78 crops
+
+PROFILE_CROPS = sorted(c for c in CROP_PROFILES if c != "Default")
+
+
+def _build_profile_class_index(encoder) -> np.ndarray:
+    if encoder is None:
+        return np.empty(0, dtype=int)
+    class_pos = {c.lower(): i for i, c in enumerate(encoder.classes_)}
+    fallback  = class_pos.get(get_model_crop("").lower(), 0)
+    return np.array([class_pos.get(get_model_crop(c).lower(), fallback)
+                     for c in PROFILE_CROPS], dtype=int)
+
+PROFILE_CLASS_INDEX = _build_profile_class_index(encoder)
+
+# SUITABILITY CACHE
+# Most /api/recommend calls send the form defaults or a handful of standard
+# soil-card values, so the forest keeps seeing the same inputs.
+# Readings are snapped to the resolution a soil lab actually reports and the
+# probability vector for that snapped sample is memoized (LRU, bounded).
+
+SOIL_QUANTUM = {
+    "pH": 0.1,        "Soil EC": 0.05,  "Phosphorus": 1.0,
+    "Potassium": 5.0, "Urea": 1.0,      "T.S.P": 1.0,
+    "M.O.P": 1.0,     "Moisture": 1.0,  "Temperature": 1.0
+}
+_QUANTUM = np.array([SOIL_QUANTUM[f] for f in SOIL_FEATURES])
+
+SUITABILITY_CACHE_SIZE = int(os.getenv("SUITABILITY_CACHE_SIZE", "4096"))
+
+_proba_cache: OrderedDict = OrderedDict()
+_proba_lock  = threading.Lock()
+_proba_stats = {"hits": 0, "misses": 0}
+
+
+def predict_soil_proba(
+    ph: float, soil_ec: float,
+    phosphorus: float, potassium: float,
+    urea: float, tsp: float, mop: float,
+    moisture: float, temperature: float
+) -> np.ndarray:
+    """
+    Class probabilities for one soil sample.
+    Near-identical samples share a cache entry and skip the forest entirely.
+    """
+    steps = np.rint(np.array([ph, soil_ec, phosphorus, potassium, urea,
+                              tsp, mop, moisture, temperature], dtype=float) / _QUANTUM)
+    key   = tuple(steps.astype(int).tolist())
+
+    with _proba_lock:
+        cached = _proba_cache.get(key)
+        if cached is not None:
+            _proba_cache.move_to_end(key)
+            _proba_stats["hits"] += 1
+            return cached
+        _proba_stats["misses"] += 1
+
+    # Predict on the snapped sample so every reading in the bucket
+    # gets the same answer regardless of which one arrived first
+    features      = pd.DataFrame([steps * _QUANTUM], columns=SOIL_FEATURES)
+    probabilities = clf.predict_proba(features)[0]
+    probabilities.setflags(write=False)
+
+    with _proba_lock:
+        _proba_cache[key] = probabilities
+        _proba_cache.move_to_end(key)
+        while len(_proba_cache) > SUITABILITY_CACHE_SIZE:
+            _proba_cache.popitem(last=False)
+    return probabilities
+
+
+def get_suitability_cache_stats() -> dict:
+    with _proba_lock:
+        hits, misses = _proba_stats["hits"], _proba_stats["misses"]
+        size         = len(_proba_cache)
+    total = hits + misses
+    return {
+        "size":         size,
+        "max_size":     SUITABILITY_CACHE_SIZE,
+        "hits":         hits,
+        "misses":       misses,
+        "hit_rate_pct": round(hits / total * 100, 1) if total else 0.0,
+        "resolution":   SOIL_QUANTUM
+    }
+
+
+def clear_suitability_cache() -> None:
+    """Call after retraining / reloading the model."""
+    with _proba_lock:
+        _proba_cache.clear()
+        _proba_stats["hits"] = _proba_stats["misses"] = 0
+
+
 # FUNCTION 1 — CROP SUITABILITY
 
 def check_crop_suitability(
@@ -138,22 +355,25 @@ def check_crop_suitability(
     if clf is None:
         return {"error": "Crop model unavailable. Check Plant_Parameters.csv"}
 
-    features = pd.DataFrame([[ph, soil_ec, phosphorus, potassium,
-                               urea, tsp, mop, moisture, temperature]],
-                             columns=["pH", "Soil EC", "Phosphorus", "Potassium",
-                                      "Urea", "T.S.P", "M.O.P", "Moisture", "Temperature"])
+    # ── Get model's prediction (memoized on quantized readings) ──
+    probabilities = predict_soil_proba(ph, soil_ec, phosphorus, potassium,
+                                       urea, tsp, mop, moisture, temperature)
+    top3_indices  = np.argsort(probabilities)[::-1][:3]
+    top3_crops    = encoder.inverse_transform(top3_indices)
+    top3_probs    = probabilities[top3_indices]
+
+    return _score_suitability(crop, top3_crops, top3_probs, ph, soil_ec, moisture)
+
+
+def _score_suitability(crop, top3_crops, top3_probs,
+                       ph, soil_ec, moisture) -> dict:
+    """Turns the model's top-3 classes for one sample into the farmer-facing result."""
 
     # ── Map farmer's crop to nearest ML model crop ──
     # ML model only knows 10 crops from dataset
     # get_model_crop() maps any of 78 crops to nearest equivalent
     crop_for_model = get_model_crop(crop)
 
-    # ── Get model's prediction using mapped crop ──
-    probabilities = clf.predict_proba(features)[0]
-    top3_indices  = np.argsort(probabilities)[::-1][:3]
-    top3_crops    = encoder.inverse_transform(top3_indices)
-    top3_probs    = probabilities[top3_indices]
-
     # ── Check suitability against MAPPED crop (not original) ──
     # Example: Onion → mapped to Carrots for model check
     mapped_lower  = crop_for_model.strip().lower()
@@ -195,61 +415,174 @@ def check_crop_suitability(
     }
 
 
+# FUNCTION 1c — RANK ALL PROFILED CROPS
+# Reverse query for the "what should I plant" screen:
+# one predict_proba call scores every crop in CROP_PROFILES
+
+def rank_crops_for_soil(
+    ph: float, soil_ec: float,
+    phosphorus: float, potassium: float,
+    urea: float, tsp: float, mop: float,
+    moisture: float, temperature: float
+) -> dict:
+
+    if clf is None:
+        return {"error": "Crop model unavailable. Check Plant_Parameters.csv"}
+
+    probabilities = predict_soil_proba(ph, soil_ec, phosphorus, potassium,
+                                       urea, tsp, mop, moisture, temperature)
+    top3_classes  = np.argsort(probabilities)[::-1][:3]
+
+    # ── Broadcast class probabilities onto every profiled crop ──
+    crop_probs  = probabilities[PROFILE_CLASS_INDEX]
+    in_top3     = np.isin(PROFILE_CLASS_INDEX, top3_classes)
+    confidence  = np.round(crop_probs * 100, 1)
+
+    # Same scoring rule as check_crop_suitability(), vectorized
+    top1_conf   = round(float(probabilities[top3_classes[0]]) * 100, 1)
+    scores      = np.where(in_top3,
+                           np.minimum(100, (confidence * 1.1).astype(int)),
+                           max(10, int(top1_conf * 0.25)))
+
+    order = np.argsort(-crop_probs, kind="stable")
+    model_classes = encoder.classes_
+
+    ranked = [{
+        "rank":              rank,
+        "crop":              PROFILE_CROPS[i],
+        "model_crop_used":   model_classes[PROFILE_CLASS_INDEX[i]],
+        "is_suitable":       bool(in_top3[i]),
+        "suitability_score": int(scores[i]),
+        "confidence":        float(confidence[i]),
+        "shelf_life_days":   CROP_PROFILES[PROFILE_CROPS[i]]["shelf_life_days"]
+    } for rank, i in enumerate(order, 1)]
+
+    suitable = [r["crop"] for r in ranked if r["is_suitable"]]
+
+    return {
+        "total_crops":    len(ranked),
+        "suitable_count": len(suitable),
+        "best_crops":     suitable[:5],
+        "ranked_crops":   ranked,
+        "summary":        (f"{len(suitable)} of {len(ranked)} crops suit this soil. "
+                           f"Top picks: {', '.join(suitable[:3])}." if suitable else
+                           "No profiled crop is a strong match for this soil.")
+    }
+
+
+# FUNCTION 1b — BATCH CROP SUITABILITY
+# Scores a whole Soil Health Card export (thousands of plots)
+# with one vectorized predict_proba per chunk instead of one per plot
+
+def normalize_soil_frame(plots: pd.DataFrame) -> pd.DataFrame:
+    """
+    Folds the column headers of a Soil Health Card export / JSON rows onto
+    SOIL_FEATURES and fills missing or blank readings with SOIL_DEFAULTS.
+    Raises ValueError if a reading is present but not numeric.
+    """
+    renamed = {}
+    for col in plots.columns:
+        key = str(col).strip()
+        if key in SOIL_FEATURES:
+            renamed[col] = key
+        elif key.lower() in SOIL_FIELD_ALIASES:
+            renamed[col] = SOIL_FIELD_ALIASES[key.lower()]
+    plots = plots.rename(columns=renamed)
+    plots = plots.loc[:, ~plots.columns.duplicated()]
+
+    out = pd.DataFrame(index=plots.index)
+    for feature in SOIL_FEATURES:
+        if feature not in plots:
+            out[feature] = SOIL_DEFAULTS[feature]
+            continue
+        raw    = plots[feature]
+        values = pd.to_numeric(raw, errors="coerce")
+        bad    = values.isna() & raw.notna() & (raw.astype(str).str.strip() != "")
+        if bad.any():
+            row = int(np.flatnonzero(bad.to_numpy())[0])
+            raise ValueError(f"Row {row + 1}: '{feature}' is not a number ({raw.iloc[row]!r})")
+        out[feature] = values.fillna(SOIL_DEFAULTS[feature]).astype(float)
+
+    row_numbers    = pd.Series(np.arange(1, len(plots) + 1), index=plots.index).astype(str)
+    out["plot_id"] = (plots["plot_id"].where(plots["plot_id"].notna(), row_numbers).astype(str)
+                      if "plot_id" in plots else row_numbers)
+    out["crop"]    = plots["crop"].fillna("").astype(str) if "crop" in plots else ""
+    return out.reset_index(drop=True)
+
+
+def check_crop_suitability_batch(plots: pd.DataFrame, chunk_size: int = 5000):
+    """
+    Generator — yields one result per plot, in input order.
+    `plots` is the output of normalize_soil_frame().
+
+    Each chunk is scored with a single predict_proba call; plots that name a
+    crop also get the same is_suitable / suitability_score as /api/recommend.
+    """
+    if clf is None:
+        raise RuntimeError("Crop model unavailable. Check Plant_Parameters.csv")
+
+    classes = [c.title() for c in encoder.classes_]
+
+    for start in range(0, len(plots), chunk_size):
+        chunk  = plots.iloc[start:start + chunk_size]
+        proba  = clf.predict_proba(chunk[SOIL_FEATURES])
+        top3   = np.argsort(-proba, axis=1)[:, :3]
+        top3_p = np.take_along_axis(proba, top3, axis=1)
+
+        rows = zip(chunk["plot_id"], chunk["crop"], chunk["pH"],
+                   chunk["Soil EC"], chunk["Moisture"], top3, top3_p)
+        for plot_id, crop, ph, soil_ec, moisture, idx, probs in rows:
+            crops = [classes[j] for j in idx]
+            item  = {
+                "plot_id":          plot_id,
+                "top_3_crops":      crops,
+                "top_3_confidence": [round(float(p) * 100, 1) for p in probs],
+            }
+            if crop.strip():
+                scored = _score_suitability(crop, crops, probs, ph, soil_ec, moisture)
+                item.update({
+                    "crop":              scored["crop"],
+                    "is_suitable":       scored["is_suitable"],
+                    "suitability_score": scored["suitability_score"],
+                    "confidence":        scored["confidence"],
+                })
+            yield item
+
+
 # FUNCTION 2 — MICRONUTRIENT WARNINGS
 
-def get_micronutrient_warnings(district: str) -> dict:
-    district_title = district.strip().title()
-    data           = MICRONUTRIENT_DATA.get(district_title)
+def get_micronutrient_warnings(district: str, state: str = None) -> dict:
+    key       = _normalize_district(district)
+    by_state  = _MICRO_RESULTS.get(key) if key else None
+
+    if by_state is None and key:
+        i = bisect.bisect_left(_MICRO_PREFIX_KEYS, key)
+        if i < len(_MICRO_PREFIX_KEYS) and _MICRO_PREFIX_KEYS[i].startswith(key):
+            by_state = _MICRO_RESULTS[_MICRO_PREFIXES[i][1]]
 
-    if not data:
-        for key in MICRONUTRIENT_DATA:
-            if district_title.lower() in key.lower():
-                data           = MICRONUTRIENT_DATA[key]
-                district_title = key
-                break
+    result = None
+    if by_state:
+        # Same-named districts: the caller's state decides, else the first listed
+        result = by_state.get(_normalize_district(state or "")) or next(iter(by_state.values()))
 
-    if not data:
+    if result is None:
+        district_title = district.strip().title()
         return {
             "district": district_title, "warnings": [],
             "summary":  f"No micronutrient data for {district_title}.",
             "available": False
         }
 
-    warnings_list = []
-    for nutrient, pct in data.items():
-        if pct >= DEFICIENCY_THRESHOLD:
-            severity = "High" if pct >= 85 else "Medium"
-            warnings_list.append({
-                "nutrient":       NUTRIENT_NAMES[nutrient],
-                "deficiency_pct": pct,
-                "severity":       severity,
-                "fix":            NUTRIENT_FIXES[nutrient]
-            })
-
-    warnings_list.sort(key=lambda x: (
-        -{"High": 2, "Medium": 1}.get(x["severity"], 0),
-        -x["deficiency_pct"]
-    ))
-
-    if warnings_list:
-        top     = warnings_list[0]
-        summary = (f"⚠️ {len(warnings_list)} micronutrient deficiencies in "
-                   f"{district_title}. Most critical: {top['nutrient']} "
-                   f"({top['deficiency_pct']}% farms deficient).")
-    else:
-        summary = f"✅ No critical micronutrient deficiencies in {district_title}."
-
-    return {
-        "district":  district_title,
-        "warnings":  warnings_list,
-        "summary":   summary,
-        "available": True
-    }
+    return {**result, "warnings": [dict(w) for w in result["warnings"]]}
 
 
 
 # FUNCTION 3 — SPOILAGE RISK
 
+# Storage penalty per storage type (1.0 = fully exposed)
+STORAGE_PENALTY = {"cold_storage": 0.1, "cool_storage": 0.3,
+                   "basic_shed": 0.6,   "open_air": 1.0}
+
 def get_spoilage_risk(
     crop: str, storage_type: str,
     transit_hours: float, temperature: float,
@@ -260,9 +593,7 @@ def get_spoilage_risk(
     profile = get_crop_profile(crop_title)
     shelf_life     = profile["shelf_life_days"]
 
-    storage_scores = {"cold_storage": 0.1, "cool_storage": 0.3,
-                      "basic_shed": 0.6,   "open_air": 1.0}
-    storage_penalty  = storage_scores.get(storage_type.lower(), 0.6)
+    storage_penalty  = STORAGE_PENALTY.get(storage_type.lower(), 0.6)
     temp_penalty     = min(1.0, max(0, temperature - profile["ideal_temp"]) / 20.0)
     humidity_penalty = min(1.0, max(0, humidity - profile["ideal_humidity"]) / 40.0)
     transit_penalty  = min(1.0, (transit_hours / 24.0) / max(1, shelf_life * 0.3))
@@ -336,6 +667,181 @@ def _get_preservation_actions(crop, risk_level, storage_type,
 
 
 
+# FUNCTION 3b — SPOILAGE WHAT-IF SURFACE
+# Same formula as get_spoilage_risk(), broadcast over
+# weather conditions × storage types × transit hours in one pass
+# so the frontend can drive sliders without re-calling /api/spoilage
+
+def get_spoilage_surface(
+    crop: str,
+    transit_hours:    list,
+    temperatures:     list,
+    humidities:       list,
+    spoilage_factors: list
+) -> dict:
+    """
+    temperatures / humidities / spoilage_factors are parallel lists —
+    one entry per weather condition (e.g. now + each forecast day).
+
+    Returns risk_score and days_safe as nested lists indexed
+    [condition][storage_type][transit_hours].
+    """
+    crop_title = crop.strip().title()
+    profile    = get_crop_profile(crop_title)
+    shelf_life = profile["shelf_life_days"]
+
+    storage_types = list(STORAGE_PENALTY)
+
+    # Axes: condition (C,1,1) × storage (1,S,1) × transit (1,1,T)
+    temp     = np.asarray(temperatures,     dtype=float)[:, None, None]
+    humidity = np.asarray(humidities,       dtype=float)[:, None, None]
+    factor   = np.asarray(spoilage_factors, dtype=float)[:, None, None]
+    storage  = np.array([STORAGE_PENALTY[s] for s in storage_types])[None, :, None]
+    hours    = np.asarray(transit_hours,    dtype=float)[None, None, :]
+
+    temp_penalty     = np.minimum(1.0, np.maximum(0, temp - profile["ideal_temp"]) / 20.0)
+    humidity_penalty = np.minimum(1.0, np.maximum(0, humidity - profile["ideal_humidity"]) / 40.0)
+    transit_penalty  = np.minimum(1.0, (hours / 24.0) / max(1, shelf_life * 0.3))
+
+    raw_score  = (storage * 0.35 + temp_penalty * 0.25 +
+                  humidity_penalty * 0.20 + transit_penalty * 0.20) * factor
+    risk_score = np.minimum(100, np.floor(raw_score * 100)).astype(int)
+    days_safe  = np.maximum(1, np.floor(shelf_life * np.maximum(0.1, 1.0 - raw_score))).astype(int)
+
+    return {
+        "crop":            crop_title,
+        "shelf_life_days": shelf_life,
+        "storage_types":   storage_types,
+        "transit_hours":   [float(h) for h in transit_hours],
+        "risk_score":      risk_score.tolist(),
+        "days_safe":       days_safe.tolist(),
+        "risk_thresholds": {"High": 65, "Medium": 35},
+        "storage_tip":     profile["storage_tip"]
+    }
+
+
+
+# FUNCTION 3c — HOUR-BY-HOUR SPOILAGE SIMULATION
+# Drives shelf-life loss from the 3-hourly forecast instead of one reading.
+# Each step burns shelf life at a rate relative to ideal storage:
+#   • doubles for every 10 °C above ideal temp (Q10 ≈ 2) — degree-hours
+#   • up to +50% when humidity is 40+ points above ideal
+# Storage shields produce from ambient: exposure = STORAGE_PENALTY
+# (cold storage passes 10% of the excess through, open air 100%).
+# Transit is assumed open-air (truck), at the conditions of departure.
+
+SIM_STEP_HOURS = 3.0
+SIM_TIMEZONE   = "Asia/Kolkata"     # departure times are shown to farmers in IST
+
+
+def simulate_spoilage(
+    crop: str, storage_type: str,
+    timeline: list, transit_hours: float = 0.0
+) -> dict:
+    """
+    timeline: forecast readings [{"time", "temperature", "humidity"}, ...]
+              3 hours apart (weather_service forecast["timeline"]).
+              "time" is UTC; times in the result are IST.
+
+    Returns the remaining-shelf-life curve for every storage type and the
+    latest time produce can leave for market and still arrive unspoiled.
+    """
+    if not timeline:
+        return {"error": "No forecast timeline available"}
+
+    crop_title  = crop.strip().title()
+    profile     = get_crop_profile(crop_title)
+    shelf_hours = profile["shelf_life_days"] * 24.0
+
+    storage_types = list(STORAGE_PENALTY)
+    open_air      = storage_types.index("open_air")
+    n_steps       = len(timeline)
+    horizon       = n_steps * SIM_STEP_HOURS
+
+    temps     = np.array([r["temperature"] for r in timeline], dtype=float)
+    humidity  = np.array([r["humidity"]    for r in timeline], dtype=float)
+    exposure  = np.array([STORAGE_PENALTY[s] for s in storage_types])[:, None]   # (S,1)
+
+    # ── Decay rate per storage type × time step ──
+    degree_excess   = np.maximum(0, temps - profile["ideal_temp"])[None, :] * exposure
+    humidity_stress = np.minimum(1.0, np.maximum(0, humidity - profile["ideal_humidity"]) / 40.0)[None, :] * exposure
+    rate            = 2.0 ** (degree_excess / 10.0) * (1.0 + 0.5 * humidity_stress)     # (S,N)
+
+    consumed        = np.cumsum(rate * SIM_STEP_HOURS, axis=1)
+    remaining_end   = shelf_hours - consumed
+    remaining_start = remaining_end + rate * SIM_STEP_HOURS
+    mean_rate       = rate.mean(axis=1)
+
+    # ── When does shelf life run out? (interpolated inside the step) ──
+    exhausted  = remaining_end[:, -1] <= 0
+    first_out  = np.argmax(remaining_end <= 0, axis=1)
+    rows       = np.arange(len(storage_types))
+    spoil_hour = np.where(
+        exhausted,
+        first_out * SIM_STEP_HOURS + remaining_start[rows, first_out] / rate[rows, first_out],
+        horizon + np.maximum(0, remaining_end[:, -1]) / mean_rate
+    )
+
+    # ── Latest departure: enough life left to survive the truck ride ──
+    transit_cost = transit_hours * rate[open_air]                                   # (N,)
+    can_leave    = remaining_start >= transit_cost[None, :]
+    any_leave    = can_leave.any(axis=1)
+    last_leave   = n_steps - 1 - np.argmax(can_leave[:, ::-1], axis=1)
+    beyond       = ~exhausted & can_leave[:, -1]
+    latest_leave = np.where(
+        beyond,
+        horizon + np.maximum(0, remaining_end[:, -1] - transit_hours * mean_rate[open_air]) / mean_rate,
+        np.where(any_leave, last_leave * SIM_STEP_HOURS, 0.0)
+    )
+
+    remaining_pct = np.round(
+        np.clip(np.hstack([np.full((len(storage_types), 1), shelf_hours), remaining_end]), 0, None)
+        / shelf_hours * 100, 1
+    )
+
+    start = pd.Timestamp(timeline[0]["time"], tz="UTC").tz_convert(SIM_TIMEZONE)
+    def _at(hours: float) -> str:
+        return (start + pd.Timedelta(hours=float(hours))).strftime("%Y-%m-%d %H:%M")
+
+    scenarios = [{
+        "storage_type":           st,
+        "spoils_in_hours":        round(float(spoil_hour[i]), 1),
+        "latest_departure_hours": round(float(latest_leave[i]), 1),
+        "latest_departure_time":  _at(latest_leave[i]),
+        "beyond_forecast":        bool(beyond[i]),
+        "sell_now":               not bool(any_leave[i]),
+        "remaining_pct":          remaining_pct[i].tolist()
+    } for i, st in enumerate(storage_types)]
+
+    selected = next((sc for sc in scenarios if sc["storage_type"] == storage_type.lower()),
+                    scenarios[storage_types.index("basic_shed")])
+
+    if selected["sell_now"]:
+        summary = (f"⚠️ {crop_title} will not survive a {transit_hours}h trip in these conditions. "
+                   f"Sell at the nearest market today.")
+    elif selected["beyond_forecast"]:
+        summary = (f"✅ {crop_title} stays safe through the {int(horizon // 24)}-day forecast. "
+                   f"Leave for market by ~{selected['latest_departure_time']} (estimated).")
+    else:
+        summary = (f"⚡ Leave for market by {selected['latest_departure_time']} — "
+                   f"{crop_title} spoils about {selected['spoils_in_hours']:.0f}h from now "
+                   f"in {selected['storage_type'].replace('_', ' ')}.")
+
+    return {
+        "crop":            crop_title,
+        "shelf_life_days": profile["shelf_life_days"],
+        "storage_type":    selected["storage_type"],
+        "transit_hours":   transit_hours,
+        "step_hours":      SIM_STEP_HOURS,
+        "hours":           (np.arange(n_steps + 1) * SIM_STEP_HOURS).tolist(),
+        "times":           [_at(h) for h in np.arange(n_steps + 1) * SIM_STEP_HOURS],
+        "selected":        selected,
+        "scenarios":       scenarios,
+        "summary":         summary
+    }
+
+
+
 # ─────────────────────────────────────────
 # FUNCTION 5 — LOSS INSURANCE ESTIMATOR
 # Financial risk layer on top of spoilage score
@@ -350,16 +856,93 @@ STORAGE_UPGRADE = {
 }
 
 
+# Monte-Carlo assumptions for the loss distribution
+# Mean loss matches the point estimate above (score/100 × 40% of value)
+# when there is no transit delay.
+LOSS_SIM_DRAWS         = 10000
+LOSS_SIM_SEED          = 7          # fixed → same inputs give same quantiles
+PRICE_VOLATILITY       = 0.10       # lognormal σ, ≈ mandi confidence_range ±10%
+LOSS_FRACTION_BETA     = (2.0, 3.0) # share of lot lost once spoilage sets in (mean 0.4)
+TRANSIT_DELAY_MEAN_HRS = 3.0        # exponential; each 24h delay doubles spoilage odds
+LOSS_QUANTILES         = [10, 50, 90, 99]
+
+
+def _storage_paths(storage_type: str) -> list:
+    """Current storage plus every upgrade reachable along STORAGE_UPGRADE."""
+    current = storage_type if storage_type in STORAGE_UPGRADE else "basic_shed"
+    paths   = [{"storage_type": current, "upgrade_cost": 0, "risk_multiplier": 1.0}]
+    while STORAGE_UPGRADE[current]["next"]:
+        step = STORAGE_UPGRADE[current]
+        paths.append({
+            "storage_type":    step["next"],
+            "upgrade_cost":    paths[-1]["upgrade_cost"] + step["upgrade_cost"],
+            "risk_multiplier": paths[-1]["risk_multiplier"] * (1 - step["risk_reduction"])
+        })
+        current = step["next"]
+    return paths
+
+
+def simulate_loss_distribution(
+    quantity_quintals: float,
+    predicted_price:   float,
+    spoilage_score:    int,
+    storage_type:      str = "basic_shed",
+    n_draws:           int = LOSS_SIM_DRAWS
+) -> list:
+    """
+    Vectorized Monte-Carlo of rupee loss for the current storage and every
+    upgrade path, using the same draws for all paths (common random numbers)
+    so differences between options are not sampling noise.
+
+    Samples per draw: mandi price, transit delay, whether spoilage sets in,
+    and how much of the lot is lost if it does.
+    """
+    rng   = np.random.default_rng(LOSS_SIM_SEED)
+    paths = _storage_paths(storage_type)
+
+    price      = predicted_price * rng.lognormal(-PRICE_VOLATILITY ** 2 / 2, PRICE_VOLATILITY, n_draws)
+    delay_hrs  = rng.exponential(TRANSIT_DELAY_MEAN_HRS, n_draws)
+    lost_share = rng.beta(*LOSS_FRACTION_BETA, n_draws)
+    spoil_u    = rng.random(n_draws)
+
+    base_prob  = np.minimum(1.0, spoilage_score / 100 * (1 + delay_hrs / 24))          # (N,)
+    multiplier = np.array([p["risk_multiplier"] for p in paths])[:, None]              # (K,1)
+    spoiled    = spoil_u[None, :] < base_prob[None, :] * multiplier                    # (K,N)
+    loss       = spoiled * (quantity_quintals * price * lost_share)[None, :]           # (K,N)
+
+    quantiles  = np.percentile(loss, LOSS_QUANTILES, axis=1)                           # (Q,K)
+    mean_loss  = loss.mean(axis=1)
+    saved      = loss[0][None, :] - loss                                               # vs staying put
+    costs      = np.array([p["upgrade_cost"] for p in paths])
+    pays_off   = (saved > costs[:, None]).mean(axis=1)
+
+    results = []
+    for k, path in enumerate(paths):
+        results.append({
+            "storage_type":     path["storage_type"],
+            "upgrade_cost":     int(path["upgrade_cost"]),
+            "mean_loss":        round(float(mean_loss[k]), 0),
+            **{f"p{q}_loss": round(float(quantiles[i, k]), 0) for i, q in enumerate(LOSS_QUANTILES)},
+            "prob_any_loss_pct": round(float(spoiled[k].mean()) * 100, 1),
+            "expected_saving":  round(float(mean_loss[0] - mean_loss[k]), 0),
+            "prob_pays_off_pct": round(float(pays_off[k]) * 100, 1) if k else None
+        })
+    return results
+
+
 def calculate_loss_risk(
     crop:              str,
     quantity_quintals: float,
     predicted_price:   float,
     spoilage_score:    int,
-    storage_type:      str = "basic_shed"
+    storage_type:      str = "basic_shed",
+    simulate:          bool = False
 ) -> dict:
     """
     Given spoilage risk and quantity, estimates the financial loss in rupees
     and calculates ROI of upgrading storage.
+    simulate=True adds a Monte-Carlo loss distribution (P10/P50/P90/P99)
+    for the current storage and every upgrade path.
     """
     loss_probability = spoilage_score / 100
     value_at_risk    = round(quantity_quintals * predicted_price, 0)
@@ -385,7 +968,7 @@ def calculate_loss_risk(
         "low"
     )
 
-    return {
+    result = {
         "quantity_quintals":    quantity_quintals,
         "predicted_price":      predicted_price,
         "value_at_risk":        value_at_risk,
@@ -402,6 +985,92 @@ def calculate_loss_risk(
         )
     }
 
+    if simulate:
+        result["loss_distribution"] = simulate_loss_distribution(
+            quantity_quintals, predicted_price, spoilage_score, storage_type
+        )
+    return result
+
+
+# FUNCTION 5b — PORTFOLIO LOSS RISK
+# Same arithmetic as calculate_loss_risk(), column-wise over thousands of
+# lots (FPO warehouses), plus per-site and per-crop exposure rollups
+
+_UPGRADE_TABLE = pd.DataFrame.from_dict(STORAGE_UPGRADE, orient="index")
+
+
+def calculate_portfolio_loss_risk(lots: pd.DataFrame) -> dict:
+    """
+    lots columns: lot_id, site, crop, quantity_quintals, predicted_price,
+                  spoilage_score, storage_type
+
+    Returns {"lots": DataFrame, "by_site": [...], "by_crop": [...], "totals": {...}}
+    """
+    storage  = lots["storage_type"].where(lots["storage_type"].isin(_UPGRADE_TABLE.index), "basic_shed")
+    upgrade  = _UPGRADE_TABLE.loc[storage].reset_index(drop=True)
+
+    quantity = lots["quantity_quintals"].to_numpy(dtype=float)
+    price    = lots["predicted_price"].to_numpy(dtype=float)
+    prob     = lots["spoilage_score"].to_numpy(dtype=float) / 100
+    cost     = upgrade["upgrade_cost"].to_numpy(dtype=float)
+
+    value_at_risk = np.round(quantity * price, 0)
+    expected_loss = np.round(value_at_risk * prob * 0.4, 0)
+    loss_saved    = np.round(expected_loss * upgrade["risk_reduction"].to_numpy(dtype=float), 0)
+    roi           = np.where(cost > 0, np.round(loss_saved / np.where(cost > 0, cost, 1), 1), 0)
+    urgency       = np.select(
+        [expected_loss > 10000, expected_loss > 3000, expected_loss > 1000],
+        ["critical", "high", "medium"], default="low"
+    )
+
+    result = pd.DataFrame({
+        "lot_id":               lots["lot_id"].to_numpy(),
+        "site":                 lots["site"].to_numpy(),
+        "crop":                 lots["crop"].str.strip().str.title().to_numpy(),
+        "storage_type":         lots["storage_type"].to_numpy(),
+        "quantity_quintals":    quantity,
+        "value_at_risk":        value_at_risk,
+        "loss_probability_pct": np.round(prob * 100, 1),
+        "expected_loss":        expected_loss,
+        "upgrade_to":           upgrade["next"].to_numpy(),
+        "upgrade_cost":         cost,
+        "loss_saved":           loss_saved,
+        "roi":                  roi,
+        "urgency":              urgency
+    })
+
+    def _rollup(key: str) -> list:
+        grouped = result.groupby(key, sort=False).agg(
+            lots              = ("lot_id",            "size"),
+            quantity_quintals = ("quantity_quintals", "sum"),
+            value_at_risk     = ("value_at_risk",     "sum"),
+            expected_loss     = ("expected_loss",     "sum"),
+            upgrade_cost      = ("upgrade_cost",      "sum"),
+            loss_saved        = ("loss_saved",        "sum"),
+            critical_lots     = ("urgency", lambda u: int((u == "critical").sum()))
+        ).sort_values("expected_loss", ascending=False)
+        grouped["loss_pct"] = np.round(
+            grouped["expected_loss"] / grouped["value_at_risk"].where(grouped["value_at_risk"] > 0) * 100, 1
+        ).fillna(0)
+        return grouped.reset_index().to_dict("records")
+
+    totals = {
+        "lots":              int(len(result)),
+        "quantity_quintals": round(float(quantity.sum()), 1),
+        "value_at_risk":     float(value_at_risk.sum()),
+        "expected_loss":     float(expected_loss.sum()),
+        "upgrade_cost":      float(cost.sum()),
+        "loss_saved":        float(loss_saved.sum()),
+        "urgency_counts":    {u: int(c) for u, c in zip(*np.unique(urgency, return_counts=True))}
+    }
+
+    return {
+        "lots":    result,
+        "by_site": _rollup("site"),
+        "by_crop": _rollup("crop"),
+        "totals":  totals
+    }
+
 
 # FUNCTION 4 — MASTER FUNCTION
 # Called by recommend.py route
@@ -414,7 +1083,8 @@ def get_crop_insight(
     moisture: float, temperature: float,
     storage_type: str = "basic_shed",
     transit_hours: float = 6.0,
-    spoilage_factor: float = 1.0
+    spoilage_factor: float = 1.0,
+    state: str = None
 ) -> dict:
 
     return {
@@ -422,7 +1092,7 @@ def get_crop_insight(
             crop, ph, soil_ec, phosphorus, potassium,
             urea, tsp, mop, moisture, temperature
         ),
-        "micronutrient": get_micronutrient_warnings(district),
+        "micronutrient": get_micronutrient_warnings(district, state),
         "spoilage":      get_spoilage_risk(
             crop, storage_type, transit_hours,
             temperature, moisture, spoilage_factor
@@ -475,4 +1145,28 @@ if __name__ == "__main__":
 
     print("\n── Preservation Actions ──")
     for i, a in enumerate(sp["actions"], 1):
-        print(f"  {i}. [{a['cost']}] {a['action']}")
\ No newline at end of file
+        print(f"  {i}. [{a['cost']}] {a['action']}")
+
+    # ── Batch vs one-by-one throughput ──
+    if clf is not None:
+        import time
+        rng   = np.random.default_rng(42)
+        plots = normalize_soil_frame(pd.DataFrame({
+            "ph":       rng.uniform(5.0, 8.5, 5000).round(1),
+            "moisture": rng.uniform(30, 90, 5000).round(0),
+            "crop":     "Tomato"
+        }))
+
+        start = time.perf_counter()
+        list(check_crop_suitability_batch(plots))
+        batch_rate = len(plots) / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for row in plots.head(50).itertuples(index=False):
+            check_crop_suitability("Tomato", *row[:len(SOIL_FEATURES)])
+        single_rate = 50 / (time.perf_counter() - start)
+
+        print("\n── Batch Suitability ──")
+        print(f"  Batch      : {batch_rate:,.0f} plots/sec")
+        print(f"  One-by-one : {single_rate:,.0f} plots/sec")
+        print(f"  Speed-up   : {batch_rate / single_rate:,.0f}x")
\ No newline at end of file
@@ -0,0 +1,216 @@
+# backend/services/geo_service.py
+#
+# Offline coordinate store for districts and mandis
+#
+#   data/geo/district_coordinates.csv  → bundled gazetteer (district HQs + aliases)
+#   data/geo/geocode_cache.json        → names resolved by the network geocoder,
+#                                        written back so each is fetched once ever
+#   register_markets(...)              → mandi_service seeds every df_mandi market
+#
+# weather_service.get_coordinates() reads from here first and only calls
+# the OpenWeather geocoder for names this store has never seen.
+
+import os
+import re
+import json
+import atexit
+import threading
+import numpy as np
+import pandas as pd
+
+BASE_DIR       = os.path.dirname(os.path.abspath(__file__))
+GAZETTEER_PATH = os.path.join(BASE_DIR, "../data/geo/district_coordinates.csv")
+GEOCODE_CACHE_PATH = os.getenv(
+    "GEOCODE_CACHE_PATH",
+    os.path.join(BASE_DIR, "../data/geo/geocode_cache.json")
+)
+FLUSH_SECONDS = 30         # new geocodes are written at most this often (plus once at exit)
+
+# precision of a stored point:
+#   district → district HQ from the gazetteer
+#   market   → mandi placed at its district HQ (geocoder may refine it once)
+#   geocoded → exact point from the network geocoder
+_store: dict = {}          # "name|state" → {"lat", "lon", "precision"}
+_lock       = threading.Lock()
+_stats      = {"hits": 0, "misses": 0, "saved": 0}
+_dirty      = False
+_flush_timer = None        # pending background write, if any
+
+
+def _normalize(name: str) -> str:
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", str(name).lower()).split())
+
+
+def _key(name: str, state: str) -> str:
+    return f"{_normalize(name)}|{_normalize(state)}"
+
+
+def _strip_qualifier(name: str) -> str:
+    """Agmarknet market names carry yards in brackets — 'Pune(Moshi)' → 'Pune'."""
+    return re.sub(r"\(.*?\)|\bapmc\b|\bf ?& ?v\b", " ", str(name), flags=re.I)
+
+
+# ─────────────────────────────────────────
+# LOAD GAZETTEER + PERSISTED GEOCODES
+# ─────────────────────────────────────────
+def _load_gazetteer() -> int:
+    try:
+        df = pd.read_csv(GAZETTEER_PATH, dtype={"aliases": str}).fillna("")
+    except FileNotFoundError:
+        print(f"⚠️ District gazetteer not found at {GAZETTEER_PATH}")
+        return 0
+
+    for row in df.itertuples(index=False):
+        point = {"lat": float(row.lat), "lon": float(row.lon), "precision": "district"}
+        for name in [row.District, *filter(None, row.aliases.split(";"))]:
+            _store.setdefault(_key(name, row.State), point)
+    return len(df)
+
+
+def _load_geocode_cache() -> int:
+    try:
+        with open(GEOCODE_CACHE_PATH, encoding="utf-8") as f:
+            saved = json.load(f)
+    except FileNotFoundError:
+        return 0
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Could not read geocode cache ({e}). Starting empty.")
+        return 0
+    _store.update(saved)
+    return len(saved)
+
+
+def flush() -> None:
+    """Write geocoded / refined entries back to disk (atomic replace) if any are new."""
+    global _dirty, _flush_timer
+    with _lock:
+        _flush_timer = None
+        if not _dirty:
+            return
+        saved  = {k: v for k, v in _store.items() if v["precision"] == "geocoded"}
+        _dirty = False
+
+    tmp = f"{GEOCODE_CACHE_PATH}.tmp"
+    try:
+        os.makedirs(os.path.dirname(GEOCODE_CACHE_PATH), exist_ok=True)
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(saved, f, ensure_ascii=False, indent=0, sort_keys=True)
+        os.replace(tmp, GEOCODE_CACHE_PATH)
+    except OSError as e:
+        print(f"⚠️ Could not save geocode cache: {e}")
+
+atexit.register(flush)
+
+
+_district_count = _load_gazetteer()
+_geocoded_count = _load_geocode_cache()
+print(f"✅ Gazetteer loaded: {_district_count} districts, {_geocoded_count} saved geocodes")
+
+
+# ─────────────────────────────────────────
+# SEED — MANDI MARKETS
+# Called by mandi_service once df_mandi is loaded.
+# Each market is placed at its own name if that is a known
+# district/town, else at its district HQ.
+# ─────────────────────────────────────────
+def register_markets(markets: pd.DataFrame) -> int:
+    """
+    markets: DataFrame with Market, District, State columns.
+    Returns number of markets added to the store.
+    """
+    added = 0
+    with _lock:
+        for market, district, state in markets[["Market", "District", "State"]].itertuples(index=False):
+            key = _key(market, state)
+            if key in _store:
+                continue
+            point = (_store.get(_key(_strip_qualifier(market), state))
+                     or _store.get(_key(district, state)))
+            if point is None:
+                continue
+            _store[key] = {"lat": point["lat"], "lon": point["lon"],
+                           "precision": point["precision"] if point["precision"] == "geocoded" else "market"}
+            added += 1
+    return added
+
+
+# ─────────────────────────────────────────
+# LOOKUP / SAVE
+# ─────────────────────────────────────────
+def lookup_coordinates(name: str, state: str):
+    """
+    Stored point for a district / market / town, or None if unknown.
+    Returned dict has lat, lon, precision.
+    """
+    point = _store.get(_key(name, state)) or _store.get(_key(_strip_qualifier(name), state))
+    with _lock:
+        _stats["hits" if point else "misses"] += 1
+    return dict(point) if point else None
+
+
+def save_coordinates(name: str, state: str, lat: float, lon: float) -> None:
+    """
+    Record a network geocoder result so it is never fetched again.
+    The file is rewritten by a background flush, never on the request path.
+    """
+    global _dirty, _flush_timer
+    with _lock:
+        _store[_key(name, state)] = {"lat": float(lat), "lon": float(lon), "precision": "geocoded"}
+        _stats["saved"] += 1
+        _dirty = True
+        if _flush_timer is None:
+            _flush_timer = threading.Timer(FLUSH_SECONDS, flush)
+            _flush_timer.daemon = True
+            _flush_timer.start()
+
+
+# ─────────────────────────────────────────
+# DISTANCE
+# ─────────────────────────────────────────
+EARTH_RADIUS_KM = 6371.0
+ROAD_FACTOR     = 1.35      # road km per straight-line km on Indian inter-city routes
+AVG_SPEED_KMH   = 50.0      # average truck speed on Indian highways
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """
+    Great-circle distance in km. Vectorized — any argument may be a NumPy
+    array (e.g. one farmer against every mandi) and broadcasting applies.
+    """
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = (np.sin((lat2 - lat1) / 2) ** 2
+         + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2)
+    return EARTH_RADIUS_KM * 2 * np.arcsin(np.sqrt(a))
+
+
+def grid_cell(lat: float, lon: float, deg: float) -> tuple:
+    """
+    Integer (row, col) of the deg-sized grid cell nearest a point. The one
+    definition of a cell, shared by the weather cache and the climatology.
+    """
+    return (round(lat / deg), round(lon / deg))
+
+
+def get_gazetteer_stats() -> dict:
+    with _lock:
+        stats = dict(_stats)
+        by_precision = pd.Series([v["precision"] for v in _store.values()]).value_counts().to_dict()
+    return {"entries": len(_store), "by_precision": by_precision, **stats}
+
+
+# ─────────────────────────────────────────
+# QUICK TEST — python geo_service.py
+# ─────────────────────────────────────────
+if __name__ == "__main__":
+    import time
+
+    for name, state in [("Pune", "Maharashtra"), ("Bangalore", "Karnataka"),
+                        ("Pune(Moshi)", "Maharashtra"), ("Nowhere", "Goa")]:
+        print(f"  {name:<14} {state:<12} → {lookup_coordinates(name, state)}")
+
+    n     = 100_000
+    start = time.perf_counter()
+    for _ in range(n):
+        lookup_coordinates("Nashik", "Maharashtra")
+    print(f"\n  {(time.perf_counter() - start) / n * 1e6:.2f} µs per lookup")
+    print(f"  {get_gazetteer_stats()}")
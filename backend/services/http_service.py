@@ -0,0 +1,460 @@
+# backend/services/http_service.py
+#
+# Shared outbound HTTP layer for every third-party API
+# (OpenWeather current / forecast / geocoding, OLA Maps routing)
+#
+#   • one keep-alive requests.Session per host → TCP/TLS reused across calls
+#   • per-host concurrency cap + timeout budget (HOST_POLICIES)
+#   • retries on connection errors / 429 / 5xx with jittered exponential
+#     backoff, honouring Retry-After, never past the host's budget
+#   • get_http_stats() → calls, retries, errors, connection reuse per host
+#   • aget / apost     → same policy on one shared httpx.AsyncClient that
+#                        lives on a dedicated I/O event loop (run_io / await_io)
+#   • rate_per_min     → token bucket per host (OpenWeather free tier = 60/min);
+#                        user calls jump ahead of background prefetch, and
+#                        identical in-flight GETs share one upstream call
+#
+# Sync callers keep their existing `except requests.exceptions.RequestException`
+# handling — everything raised by get/post is a RequestException.
+# Async callers catch httpx.HTTPError and UpstreamBusy.
+
+import time
+import heapq
+import random
+import asyncio
+import contextvars
+import threading
+import os
+import httpx
+import requests
+from urllib.parse import urlsplit
+from requests.adapters import HTTPAdapter
+
+# ─────────────────────────────────────────
+# PER-HOST POLICY
+# timeout         → (connect, read) seconds for one attempt
+# budget          → max seconds spent on a call including retries + backoff
+# max_concurrency → in-flight requests allowed to this host
+# retries         → extra attempts after the first
+# rate_per_min    → token bucket refill rate (None = unlimited); every
+#                   attempt, retries included, spends one token
+# ─────────────────────────────────────────
+DEFAULT_POLICY = {"timeout": (3.05, 15), "budget": 20.0, "max_concurrency": 8, "retries": 2,
+                  "rate_per_min": None}
+
+HOST_POLICIES = {
+    "api.openweathermap.org": {"timeout": (3.05, 10), "budget": 15.0, "max_concurrency": 8, "retries": 2,
+                               "rate_per_min": int(os.getenv("OPENWEATHER_CALLS_PER_MIN", "60"))},
+    "api.olamaps.io":         {"timeout": (3.05, 12), "budget": 15.0, "max_concurrency": 4, "retries": 2},
+}
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+BACKOFF_BASE   = 0.5    # seconds, doubled per attempt
+BACKOFF_MAX    = 4.0
+
+
+class UpstreamBusy(requests.exceptions.RequestException):
+    """All concurrency slots for a host stayed taken for the whole budget."""
+
+
+class UpstreamThrottled(UpstreamBusy):
+    """No rate-limit token became available within the caller's wait budget."""
+
+
+# ─────────────────────────────────────────
+# PRIORITY
+# Set PRIORITY to BACKGROUND in prefetch / warm-up code; every call made
+# from that context (and tasks it spawns) queues behind user requests.
+# ─────────────────────────────────────────
+USER, BACKGROUND = 0, 1
+PRIORITY         = contextvars.ContextVar("http_priority", default=USER)
+BACKGROUND_MAX_WAIT = 60.0      # background calls give up after this long in the queue
+
+
+class _TokenBucket:
+    """
+    Async token bucket with a priority wait queue. I/O loop only.
+    Waiters are served strictly by (priority, arrival order).
+    """
+
+    def __init__(self, rate_per_min: float):
+        self.rate     = rate_per_min / 60.0
+        self.capacity = float(rate_per_min)
+        self.tokens   = self.capacity
+        self.updated  = time.monotonic()
+        self._queue   = []          # heap of (priority, seq, future)
+        self._seq     = 0
+        self._pump    = None
+        self.stats    = {"granted": 0, "queued": 0, "throttled": 0,
+                         "max_queue_depth": 0, "wait_ms_total": 0.0}
+
+    def _refill(self) -> None:
+        now          = time.monotonic()
+        self.tokens  = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def queue_depth(self) -> int:
+        return sum(1 for _, _, f in self._queue if not f.done())
+
+    async def acquire(self, priority: int, timeout: float) -> None:
+        self._refill()
+        if not self._queue and self.tokens >= 1:
+            self.tokens -= 1
+            self.stats["granted"] += 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (priority, self._seq, future))
+        self._seq += 1
+        self.stats["queued"] += 1
+        self.stats["max_queue_depth"] = max(self.stats["max_queue_depth"], self.queue_depth())
+        if self._pump is None or self._pump.done():
+            self._pump = asyncio.ensure_future(self._run_pump())
+
+        start = time.monotonic()
+        try:
+            await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            self.stats["throttled"] += 1
+            raise
+        self.stats["wait_ms_total"] += (time.monotonic() - start) * 1000
+
+    async def _run_pump(self) -> None:
+        while self._queue:
+            self._refill()
+            if self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                continue
+            _, _, future = heapq.heappop(self._queue)
+            if future.done():           # waiter timed out / cancelled
+                continue
+            self.tokens -= 1
+            self.stats["granted"] += 1
+            future.set_result(None)
+
+    def snapshot(self) -> dict:
+        # Read-only — may be called from outside the I/O loop
+        tokens = min(self.capacity, self.tokens + (time.monotonic() - self.updated) * self.rate)
+        granted_from_queue = self.stats["queued"] - self.stats["throttled"]
+        return {
+            "rate_per_min":     round(self.rate * 60),
+            "tokens_available": round(tokens, 1),
+            "queue_depth":      self.queue_depth(),
+            **{k: v for k, v in self.stats.items() if k != "wait_ms_total"},
+            "avg_wait_ms":      round(self.stats["wait_ms_total"] / granted_from_queue, 1)
+                                if granted_from_queue > 0 else 0.0
+        }
+
+
+class _Host:
+    def __init__(self, name: str):
+        self.name      = name
+        self.policy    = {**DEFAULT_POLICY, **HOST_POLICIES.get(name, {})}
+        self.semaphore = threading.BoundedSemaphore(self.policy["max_concurrency"])
+        self.asemaphore = asyncio.Semaphore(self.policy["max_concurrency"])   # I/O loop only
+        self.bucket    = (_TokenBucket(self.policy["rate_per_min"])
+                          if self.policy["rate_per_min"] else None)
+        self.pending: dict = {}     # coalescing: (GET key, priority) → asyncio.Future (I/O loop only)
+        self.session   = requests.Session()
+        adapter        = HTTPAdapter(pool_connections=1,
+                                     pool_maxsize=self.policy["max_concurrency"],
+                                     max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://",  adapter)
+        self.adapter   = adapter
+        self.lock      = threading.Lock()
+        self.stats     = {"calls": 0, "attempts": 0, "retries": 0, "errors": 0,
+                          "throttled": 0, "busy": 0, "coalesced": 0, "rate_limited": 0}
+
+    def connection_stats(self) -> dict:
+        """urllib3 counts requests vs. connections it had to open per pool."""
+        container = self.adapter.poolmanager.pools
+        pools     = [p for p in (container.get(k) for k in container.keys()) if p is not None]
+        opened    = sum(p.num_connections for p in pools)
+        sent      = sum(p.num_requests for p in pools)
+        return {
+            "connections_opened": opened,
+            "pooled_requests":    sent,
+            "reuse_pct":          round((1 - opened / sent) * 100, 1) if sent else 0.0
+        }
+
+
+_hosts: dict = {}
+_hosts_lock  = threading.Lock()
+
+
+def _host(url: str) -> _Host:
+    name = urlsplit(url).hostname or ""
+    host = _hosts.get(name)
+    if host is None:
+        with _hosts_lock:
+            host = _hosts.setdefault(name, _Host(name))
+    return host
+
+
+def _backoff(attempt: int, response=None) -> float:
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after and retry_after.isdigit():
+        return float(retry_after)
+    delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt)
+    return delay * random.uniform(0.5, 1.5)
+
+
+def _count(host: _Host, key: str, n: int = 1) -> None:
+    with host.lock:
+        host.stats[key] += n
+
+
+# ─────────────────────────────────────────
+# REQUEST
+# ─────────────────────────────────────────
+def request(method: str, url: str, **kwargs) -> requests.Response:
+    """
+    Drop-in for requests.request() through the pooled session for url's host.
+    Returns the last response (even a 429/5xx once retries are spent) so the
+    caller's raise_for_status() / status handling still applies.
+    """
+    host     = _host(url)
+    policy   = host.policy
+    deadline = time.monotonic() + policy["budget"]
+    kwargs.setdefault("timeout", policy["timeout"])
+    _count(host, "calls")
+
+    attempt = 0
+    while True:
+        # Token first, then a concurrency slot (same order as _arequest) —
+        # a call queued on the rate limit must not sit on a slot
+        if host.bucket is not None:
+            run_io(_take_token(host, deadline))
+        if not host.semaphore.acquire(timeout=max(deadline - time.monotonic(), 0.01)):
+            _count(host, "busy")
+            raise UpstreamBusy(f"{host.name}: {policy['max_concurrency']} requests already in flight")
+
+        _count(host, "attempts")
+        response, error = None, None
+        try:
+            response = host.session.request(method, url, **kwargs)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            error = e
+        finally:
+            host.semaphore.release()
+
+        if error is None and response.status_code not in RETRY_STATUSES:
+            return response
+
+        if response is not None and response.status_code == 429:
+            _count(host, "throttled")
+
+        delay = _backoff(attempt, response)
+        if attempt >= policy["retries"] or time.monotonic() + delay > deadline:
+            _count(host, "errors")
+            if error is not None:
+                raise error
+            return response
+
+        _count(host, "retries")
+        time.sleep(delay)
+        attempt += 1
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    return request("GET", url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    return request("POST", url, **kwargs)
+
+
+# ─────────────────────────────────────────
+# ASYNC CLIENT
+# One httpx.AsyncClient on one long-lived I/O loop thread.
+# Sync code blocks on run_io(coro); coroutines on any other loop
+# (FastAPI's) use await_io(coro). Either way every caller shares
+# the same connection pool and per-host limits.
+# ─────────────────────────────────────────
+ASYNC_LIMITS = httpx.Limits(max_connections=64, max_keepalive_connections=32, keepalive_expiry=60)
+
+_io_loop      = None
+_io_thread    = None
+_io_lock      = threading.Lock()
+_async_client = None
+
+
+def _get_io_loop() -> asyncio.AbstractEventLoop:
+    global _io_loop, _io_thread
+    if _io_loop is None:
+        with _io_lock:
+            if _io_loop is None:
+                loop       = asyncio.new_event_loop()
+                _io_thread = threading.Thread(target=loop.run_forever, name="http-io", daemon=True)
+                _io_thread.start()
+                _io_loop   = loop
+    return _io_loop
+
+
+def run_io(coro):
+    """Run coro on the I/O loop and block until it finishes (sync callers)."""
+    loop = _get_io_loop()
+    if threading.current_thread() is _io_thread:
+        coro.close()
+        raise RuntimeError("run_io() called from the I/O loop — await the coroutine instead")
+    return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+
+async def await_io(coro):
+    """Await coro on the I/O loop from another event loop without blocking it."""
+    return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, _get_io_loop()))
+
+
+def _client() -> httpx.AsyncClient:
+    # Only ever touched from the I/O loop thread, so no lock needed
+    global _async_client
+    if _async_client is None:
+        _async_client = httpx.AsyncClient(limits=ASYNC_LIMITS)
+    return _async_client
+
+
+def _coalesce_key(method: str, url: str, kwargs: dict):
+    if method != "GET" or set(kwargs) - {"params", "timeout"}:
+        return None
+    params = kwargs.get("params") or {}
+    return url, tuple(sorted((k, str(v)) for k, v in params.items()))
+
+
+async def arequest(method: str, url: str, **kwargs) -> httpx.Response:
+    """
+    Async twin of request(); must run on the I/O loop (wrap with run_io / await_io).
+    Same retry, backoff, budget and concurrency policy per host, plus the
+    host's token bucket. Identical GETs already in flight share that call —
+    except that a USER call never joins a BACKGROUND one (it would inherit
+    the background call's long wait for a token).
+    """
+    host = _host(url)
+    key  = _coalesce_key(method, url, kwargs)
+    if key is not None:
+        priority = PRIORITY.get()
+        pending  = host.pending.get((key, USER))
+        if pending is None and priority != USER:
+            pending = host.pending.get((key, priority))
+        if pending is not None:
+            _count(host, "coalesced")
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise
+                # The leading caller was cancelled, not this one — make the call ourselves
+                return await arequest(method, url, **kwargs)
+        flight  = (key, priority)
+        pending = host.pending[flight] = asyncio.get_running_loop().create_future()
+        try:
+            response = await _arequest(host, method, url, **kwargs)
+            pending.set_result(response)
+            return response
+        except Exception as e:
+            pending.set_exception(e)
+            pending.exception()         # mark retrieved — re-raised below
+            raise
+        finally:
+            # Cancelled (client disconnect, deadline): release coalesced callers
+            if not pending.done():
+                pending.cancel()
+            host.pending.pop(flight, None)
+    return await _arequest(host, method, url, **kwargs)
+
+
+async def _take_token(host: _Host, deadline: float) -> None:
+    priority = PRIORITY.get()
+    wait     = deadline - time.monotonic()
+    if priority != USER:
+        wait = BACKGROUND_MAX_WAIT
+    try:
+        await host.bucket.acquire(priority, max(wait, 0.01))
+    except asyncio.TimeoutError:
+        _count(host, "rate_limited")
+        raise UpstreamThrottled(f"{host.name}: rate limit {host.policy['rate_per_min']}/min reached")
+
+
+async def _arequest(host: _Host, method: str, url: str, **kwargs) -> httpx.Response:
+    policy   = host.policy
+    deadline = time.monotonic() + policy["budget"]
+    connect, read = kwargs.pop("timeout", policy["timeout"])
+    timeout  = httpx.Timeout(read, connect=connect)
+    _count(host, "calls")
+
+    attempt = 0
+    while True:
+        # Token first, then a concurrency slot — a call queued on the rate
+        # limit must not hold a slot a higher-priority call could use
+        if host.bucket is not None:
+            await _take_token(host, deadline)
+        try:
+            await asyncio.wait_for(host.asemaphore.acquire(), max(deadline - time.monotonic(), 0.01))
+        except asyncio.TimeoutError:
+            _count(host, "busy")
+            raise UpstreamBusy(f"{host.name}: {policy['max_concurrency']} requests already in flight")
+
+        _count(host, "attempts")
+        response, error = None, None
+        try:
+            response = await _client().request(method, url, timeout=timeout, **kwargs)
+        except httpx.TransportError as e:
+            error = e
+        finally:
+            host.asemaphore.release()
+
+        if error is None and response.status_code not in RETRY_STATUSES:
+            return response
+
+        if response is not None and response.status_code == 429:
+            _count(host, "throttled")
+
+        delay = _backoff(attempt, response)
+        if attempt >= policy["retries"] or time.monotonic() + delay > deadline:
+            _count(host, "errors")
+            if error is not None:
+                raise error
+            return response
+
+        _count(host, "retries")
+        await asyncio.sleep(delay)
+        attempt += 1
+
+
+async def aget(url: str, **kwargs) -> httpx.Response:
+    return await arequest("GET", url, **kwargs)
+
+
+async def apost(url: str, **kwargs) -> httpx.Response:
+    return await arequest("POST", url, **kwargs)
+
+
+def get_http_stats() -> dict:
+    with _hosts_lock:
+        hosts = list(_hosts.values())
+    result = {}
+    for host in hosts:
+        with host.lock:
+            stats = dict(host.stats)
+        result[host.name] = {
+            **stats,
+            "max_concurrency": host.policy["max_concurrency"],
+            **host.connection_stats()
+        }
+        if host.bucket is not None:
+            result[host.name]["rate_limit"] = host.bucket.snapshot()
+    return result
+
+
+# ─────────────────────────────────────────
+# QUICK TEST — python http_service.py
+# ─────────────────────────────────────────
+if __name__ == "__main__":
+    for _ in range(5):
+        try:
+            get("https://api.openweathermap.org/data/2.5/weather",
+                params={"q": "Pune", "appid": "demo"})
+        except requests.exceptions.RequestException as e:
+            print(f"  request failed: {e}")
+    for name, stats in get_http_stats().items():
+        print(f"  {name}: {stats}")
@@ -0,0 +1,258 @@
+# backend/services/llm_cache_service.py
+#
+# Response cache for LLM recommendations
+#
+#   response_key(kind, language, context, fields) → key from the canonical context
+#   get_cached_response(key, context)             → cached text or None
+#   save_response(key, context, text, seconds)    → keep it (memory + data/llm/response_cache.json)
+#
+# Farmers in the same district, crop and week send near-identical prompts,
+# so the context is canonicalized before hashing: prices bucketed to
+# PRICE_BUCKET rupees, the harvest date to its ISO week. On a hit the
+# exact prices and date the cached answer quoted are swapped for this
+# farmer's own values in one pass (whole numbers only), so the reply
+# still uses the EXACT numbers the prompt promised. Other numbers the
+# answer may quote (price trend %, suitability score) stay exact in the key.
+
+import os
+import re
+import sys
+import json
+import time
+import atexit
+import hashlib
+import threading
+from datetime import date
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from services.cache_service import TTLCache
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+LLM_CACHE_PATH = os.getenv(
+    "LLM_CACHE_PATH",
+    os.path.join(BASE_DIR, "../data/llm/response_cache.json")
+)
+
+LLM_CACHE_TTL    = float(os.getenv("LLM_CACHE_TTL_HOURS", "12")) * 3600
+LLM_CACHE_SIZE   = int(os.getenv("LLM_CACHE_SIZE", "5000"))
+FLUSH_SECONDS    = 60       # at most one disk write per minute (plus one at exit)
+
+PRICE_BUCKET     = 20       # ₹/quintal
+SCORE_BUCKET     = 10
+
+_responses = TTLCache("llm_responses", maxsize=LLM_CACHE_SIZE, ttl=LLM_CACHE_TTL)
+_saved: dict = {}           # key → {"stored_at", "value"} — what is written to disk
+_lock        = threading.Lock()
+_dirty       = False
+_flush_timer = None         # pending background write, if any
+_stats       = {"saved": 0, "llm_seconds_saved": 0.0, "ambiguous": 0}
+
+_DATE_RE  = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+
+# ─────────────────────────────────────────
+# CANONICAL CONTEXT
+# ─────────────────────────────────────────
+def _number(value):
+    try:
+        return float(str(value).replace(",", ""))
+    except ValueError:
+        return None
+
+
+def _bucket(step: float):
+    def canon(value):
+        number = _number(value)
+        return str(value).strip().lower() if number is None else round(number / step) * step
+    return canon
+
+
+def _canon_week(value):
+    match = _DATE_RE.search(str(value))
+    if not match:
+        return str(value).strip().lower()
+    year, week, _ = date.fromisoformat(match.group()).isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+CANONICAL = {
+    "predicted_price":   _bucket(PRICE_BUCKET),
+    "best_market_price": _bucket(PRICE_BUCKET),
+    "days_safe":         _bucket(1),
+    "transit_hours":     _bucket(1),
+    "soil_ph":           _bucket(0.5),
+    "soil_moisture":     _bucket(SCORE_BUCKET),
+    "harvest_window":    _canon_week,
+}
+
+
+def _verbatim(context: dict) -> dict:
+    """Values a cached answer may quote word for word — swapped on a hit."""
+    found = {}
+    for field in ("predicted_price", "best_market_price"):
+        if field in context:
+            found[field] = str(context[field])
+    match = _DATE_RE.search(str(context.get("harvest_window", "")))
+    if match and match.group() != str(context.get("best_harvest_day", "")):
+        found["harvest_window"] = match.group()
+    return found
+
+
+def _swap_verbatim(text: str, swaps: dict) -> str:
+    """
+    Replace every old → new value at once, so a value just swapped in is
+    never rewritten by the next field. Only whole numbers / dates match:
+    '1,234.56' is not touched inside '11,234.567'.
+    """
+    alternatives = "|".join(re.escape(old) for old in sorted(swaps, key=len, reverse=True))
+    pattern      = re.compile(rf"(?<!\d)(?<!\d[.,])({alternatives})(?!\d)(?![.,]\d)")
+    return pattern.sub(lambda m: swaps[m.group(1)], text)
+
+
+def response_key(kind: str, language: str, context: dict, fields=None, extra: str = "") -> str:
+    """
+    kind     : which prompt ("harvest" ...)
+    fields   : context keys the prompt actually uses (None = all)
+    extra    : anything else the answer depends on (model, template hash)
+    """
+    items = sorted(
+        (k, CANONICAL.get(k, lambda v: str(v).strip().lower())(v))
+        for k, v in context.items() if fields is None or k in fields
+    )
+    raw = json.dumps([kind, language, extra, items], ensure_ascii=False, default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+# ─────────────────────────────────────────
+# LOAD / PERSIST
+# ─────────────────────────────────────────
+def _load() -> int:
+    try:
+        with open(LLM_CACHE_PATH, encoding="utf-8") as f:
+            stored = json.load(f)
+    except FileNotFoundError:
+        return 0
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Could not read LLM response cache ({e}). Starting empty.")
+        return 0
+
+    now = time.time()
+    for key, entry in stored.items():
+        if now - entry["stored_at"] >= LLM_CACHE_TTL:
+            continue
+        _saved[key] = entry
+        _responses.set(key, entry["value"], stored_at=entry["stored_at"])
+    return len(_saved)
+
+
+def flush() -> None:
+    """Write live responses to disk (atomic replace) if anything changed."""
+    global _dirty, _flush_timer
+    with _lock:
+        _flush_timer = None
+        if not _dirty:
+            return
+        now = time.time()
+        for key in [k for k, v in _saved.items() if now - v["stored_at"] >= LLM_CACHE_TTL]:
+            del _saved[key]
+        while len(_saved) > LLM_CACHE_SIZE:
+            del _saved[min(_saved, key=lambda k: _saved[k]["stored_at"])]
+        snapshot = dict(_saved)
+        _dirty   = False
+
+    tmp = f"{LLM_CACHE_PATH}.tmp"
+    try:
+        os.makedirs(os.path.dirname(LLM_CACHE_PATH), exist_ok=True)
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f, ensure_ascii=False)
+        os.replace(tmp, LLM_CACHE_PATH)
+    except OSError as e:
+        print(f"⚠️ Could not save LLM response cache: {e}")
+
+atexit.register(flush)
+
+
+_loaded = _load()
+print(f"✅ LLM response cache loaded: {_loaded} saved responses")
+
+
+# ─────────────────────────────────────────
+# LOOKUP / SAVE
+# ─────────────────────────────────────────
+def get_cached_response(key: str, context: dict):
+    """Cached text for key with this context's exact prices / date, or None."""
+    entry = _responses.get(key)
+    if entry is None:
+        return None
+
+    swaps = {}
+    for field, value in _verbatim(context).items():
+        old = entry["verbatim"].get(field)
+        if not old:
+            continue
+        if swaps.setdefault(old, value) != value:
+            # Two fields quoted the same number but now differ — can't tell them apart
+            with _lock:
+                _stats["ambiguous"] += 1
+            return None
+    swaps = {old: new for old, new in swaps.items() if old != new}
+
+    text = _swap_verbatim(entry["text"], swaps) if swaps else entry["text"]
+    with _lock:
+        _stats["llm_seconds_saved"] += entry["seconds"]
+    return text
+
+
+def save_response(key: str, context: dict, text: str, seconds: float) -> None:
+    """
+    Keep a successful LLM answer (never a rule-based fallback).
+    The file is rewritten by a background flush, never on the caller's loop.
+    """
+    global _dirty, _flush_timer
+    value = {"text": text, "verbatim": _verbatim(context), "seconds": round(seconds, 2)}
+    now   = time.time()
+    _responses.set(key, value, stored_at=now)
+    with _lock:
+        _saved[key] = {"stored_at": now, "value": value}
+        _stats["saved"] += 1
+        _dirty = True
+        if _flush_timer is None:
+            _flush_timer = threading.Timer(FLUSH_SECONDS, flush)
+            _flush_timer.daemon = True
+            _flush_timer.start()
+
+
+def get_llm_cache_stats() -> dict:
+    with _lock:
+        stats     = dict(_stats)
+        persisted = len(_saved)
+    stats["llm_seconds_saved"] = round(stats["llm_seconds_saved"], 1)
+    return {**_responses.stats(), "persisted": persisted, **stats}
+
+
+# ─────────────────────────────────────────
+# QUICK TEST — python llm_cache_service.py
+# ─────────────────────────────────────────
+if __name__ == "__main__":
+    farmer_a = {"crop": "Tomato", "district": "Pune", "predicted_price": "1,234.56",
+                "best_market_price": "1,410.00", "price_trend": "rising (6.2%)",
+                "harvest_window": "Around 2025-10-15", "suitability_score": 72}
+    farmer_b = {**farmer_a, "crop": "tomato ", "predicted_price": "1,238.10",
+                "harvest_window": "Around 2025-10-16"}
+    farmer_c = {**farmer_b, "price_trend": "rising (4.9%)"}
+
+    key_a = response_key("harvest", "hi", farmer_a)
+    key_b = response_key("harvest", "hi", farmer_b)
+    print(f"  same bucket : {key_a == key_b}")
+    print(f"  other trend : {key_a == response_key('harvest', 'hi', farmer_c)}")
+
+    save_response(key_a, farmer_a, "1. Harvest on 2025-10-15 ... expect Rs.1,234.56/quintal", 2.4)
+    print(f"  farmer B    : {get_cached_response(key_b, farmer_b)}")
+
+    n     = 100_000
+    start = time.perf_counter()
+    for _ in range(n):
+        get_cached_response(response_key("harvest", "hi", farmer_b), farmer_b)
+    print(f"  {(time.perf_counter() - start) / n * 1e6:.1f} µs per key + lookup")
+    print(f"  {get_llm_cache_stats()}")
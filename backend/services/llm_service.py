@@ -1,22 +1,254 @@
 # backend/services/llm_service.py
 
 import os
-from openai import OpenAI
+import sys
+import time
+import string
+import asyncio
+import hashlib
+import threading
+from collections import deque
+import openai
+from openai import AsyncOpenAI
 from dotenv import load_dotenv
 
 load_dotenv()
 
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from services import http_service
+from services.llm_cache_service import response_key, get_cached_response, save_response
+
 # ─────────────────────────────────────────
 # CLIENT SETUP
 # OpenAI SDK pointed at Groq's endpoint
 # To switch providers: change .env only
 # ─────────────────────────────────────────
-client = OpenAI(
-    api_key  = os.getenv("GROQ_API_KEY"),
-    base_url = os.getenv("LLM_BASE_URL", "https://api.groq.com/openai/v1")
-)
+LLM_API_KEY  = os.getenv("GROQ_API_KEY")
+LLM_BASE_URL = os.getenv("LLM_BASE_URL", "https://api.groq.com/openai/v1")
+LLM_MODEL    = os.getenv("LLM_MODEL", "llama-3.3-70b-versatile")
+VISION_MODEL = "llama-3.2-11b-vision-preview"
+
+_aclient = None
+
+
+def _client() -> AsyncOpenAI:
+    # Created and only ever used on the http_service I/O loop
+    global _aclient
+    if _aclient is None:
+        _aclient = AsyncOpenAI(api_key=LLM_API_KEY, base_url=LLM_BASE_URL, max_retries=0)
+    return _aclient
+
 
-LLM_MODEL = os.getenv("LLM_MODEL", "llama-3.3-70b-versatile")
+# ─────────────────────────────────────────
+# ASYNC LLM GATEWAY
+# Every LLM call goes through _chat() on the http_service I/O loop:
+#   - at most LLM_MAX_INFLIGHT calls run at once; the rest wait, but
+#     never past their deadline
+#   - each call gets the caller's remaining request budget as its
+#     timeout (capped at LLM_TIMEOUT) instead of the SDK's 10 minutes
+#   - after BREAKER_FAILURES failed or slow calls in a row the circuit
+#     opens: callers get the rule-based fallback at once for
+#     BREAKER_COOLDOWN seconds, then a single probe call is let through.
+#     One breaker per model, and only provider trouble (timeouts,
+#     connection errors, 429, 5xx) counts — a rejected image or other
+#     4xx is the request's fault, not the provider's
+# Sync wrappers use http_service.run_io, async routes await_io.
+# ─────────────────────────────────────────
+LLM_TIMEOUT      = float(os.getenv("LLM_TIMEOUT_SECONDS", "12"))
+LLM_MAX_INFLIGHT = int(os.getenv("LLM_MAX_INFLIGHT", "8"))
+LLM_SLOW_SECONDS = float(os.getenv("LLM_SLOW_SECONDS", "8"))   # slower counts as a failure
+BREAKER_FAILURES = 5
+BREAKER_COOLDOWN = 30.0
+RECENT_CALLS     = 200     # window for latency percentiles / error rate
+
+
+class LLMUnavailable(Exception):
+    """LLM call refused or failed — callers switch to the rule-based fallback."""
+
+
+class _CircuitBreaker:
+    """closed → (BREAKER_FAILURES in a row) → open → (cooldown) → half_open → one probe."""
+
+    def __init__(self, failures: int, cooldown: float):
+        self.failures  = failures
+        self.cooldown  = cooldown
+        self.state     = "closed"
+        self.in_a_row  = 0
+        self.opened_at = 0.0
+        self.opens     = 0
+
+    def allow(self) -> bool:
+        if self.state == "closed":
+            return True
+        if self.state == "open" and time.monotonic() - self.opened_at >= self.cooldown:
+            self.state = "half_open"          # this caller is the probe
+            return True
+        return False
+
+    def release(self) -> None:
+        """A granted probe never reached the provider — let the next caller probe."""
+        if self.state == "half_open":
+            self.state = "open"
+            self.opened_at = time.monotonic() - self.cooldown
+
+    def record(self, ok: bool) -> None:
+        if ok:
+            self.state, self.in_a_row = "closed", 0
+            return
+        self.in_a_row += 1
+        if self.state == "half_open" or self.in_a_row >= self.failures:
+            if self.state != "open":
+                self.opens += 1
+            self.state, self.opened_at = "open", time.monotonic()
+
+
+_breakers: dict = {}                           # model → _CircuitBreaker
+_inflight  = None                              # asyncio.Semaphore, made on the I/O loop
+_active    = 0
+_latencies = deque(maxlen=RECENT_CALLS)        # seconds, successful calls
+_outcomes  = deque(maxlen=RECENT_CALLS)        # True = ok
+_gw_stats  = {"calls": 0, "ok": 0, "errors": 0, "bad_requests": 0, "timeouts": 0,
+              "cut_by_deadline": 0, "slow": 0,
+              "rejected_open": 0, "rejected_busy": 0, "rejected_deadline": 0}
+
+
+def _remaining(deadline) -> float:
+    budget = LLM_TIMEOUT if deadline is None else min(LLM_TIMEOUT, deadline - time.monotonic())
+    if budget <= 0:
+        _gw_stats["rejected_deadline"] += 1
+        raise LLMUnavailable("request budget spent")
+    return budget
+
+
+def _breaker_for(model: str) -> _CircuitBreaker:
+    breaker = _breakers.get(model)
+    if breaker is None:
+        breaker = _breakers[model] = _CircuitBreaker(BREAKER_FAILURES, BREAKER_COOLDOWN)
+    return breaker
+
+
+def _provider_fault(e: Exception) -> bool:
+    """True if the error says the provider is unhealthy (vs. a bad request)."""
+    if isinstance(e, (openai.APIConnectionError, openai.RateLimitError)):   # includes APITimeoutError
+        return True
+    return isinstance(e, openai.APIStatusError) and e.status_code >= 500
+
+
+def _record(breaker: _CircuitBreaker, ok: bool, seconds: float = None) -> None:
+    _outcomes.append(ok)
+    if seconds is not None:
+        _latencies.append(seconds)
+    breaker.record(ok)
+
+
+async def _chat(messages: list, max_tokens: int, temperature: float = 0.3,
+                model: str = None, deadline: float = None, on_chunk=None) -> str:
+    """
+    One chat completion through the gateway; returns the full text.
+    deadline : time.monotonic() by which the caller needs an answer
+    on_chunk : if given, the reply is streamed and on_chunk(text) is
+               called for every piece as it arrives
+    Raises LLMUnavailable on breaker / budget / provider failure.
+    """
+    global _inflight, _active
+    model   = model or LLM_MODEL
+    breaker = _breaker_for(model)
+    _gw_stats["calls"] += 1
+    if not breaker.allow():
+        _gw_stats["rejected_open"] += 1
+        raise LLMUnavailable("circuit open")
+
+    if _inflight is None:
+        _inflight = asyncio.Semaphore(LLM_MAX_INFLIGHT)
+    try:
+        await asyncio.wait_for(_inflight.acquire(), _remaining(deadline))
+    except (asyncio.TimeoutError, LLMUnavailable):
+        breaker.release()
+        _gw_stats["rejected_busy"] += 1
+        raise LLMUnavailable("too many LLM calls in flight")
+    except BaseException:
+        breaker.release()               # cancelled while queued — a probe must not stay claimed
+        raise
+
+    _active += 1
+    start    = time.monotonic()
+    try:
+        request = dict(model=model, messages=messages,
+                       temperature=temperature, max_tokens=max_tokens)
+        if on_chunk is None:
+            response = await asyncio.wait_for(_client().chat.completions.create(**request),
+                                              _remaining(deadline))
+            text = response.choices[0].message.content
+        else:
+            stream = await asyncio.wait_for(_client().chat.completions.create(**request, stream=True),
+                                            _remaining(deadline))
+            parts  = []
+            events = stream.__aiter__()
+            while True:
+                try:
+                    event = await asyncio.wait_for(events.__anext__(), _remaining(deadline))
+                except StopAsyncIteration:
+                    break
+                delta = event.choices[0].delta.content if event.choices else None
+                if delta:
+                    parts.append(delta)
+                    on_chunk(delta)
+            text = "".join(parts)
+    except asyncio.TimeoutError:
+        if deadline is not None and time.monotonic() >= deadline - 0.05:
+            # The caller's shorter budget ran out, not LLM_TIMEOUT — no verdict on the provider
+            _gw_stats["cut_by_deadline"] += 1
+            breaker.release()
+        else:
+            _gw_stats["timeouts"] += 1
+            _record(breaker, False)
+        raise LLMUnavailable(f"no answer within {time.monotonic() - start:.1f}s")
+    except LLMUnavailable:
+        breaker.release()               # caller's budget ran out — not the provider's fault
+        raise
+    except Exception as e:
+        if _provider_fault(e):
+            _gw_stats["errors"] += 1
+            _record(breaker, False)
+        else:
+            _gw_stats["bad_requests"] += 1
+            breaker.record(True)        # the provider answered; the request was at fault
+        raise LLMUnavailable(str(e)) from e
+    except BaseException:
+        breaker.release()               # cancelled (client gone) — no verdict on the provider
+        raise
+    finally:
+        _active -= 1
+        _inflight.release()
+
+    seconds = time.monotonic() - start
+    slow    = seconds > LLM_SLOW_SECONDS
+    _gw_stats["ok"] += 1
+    _gw_stats["slow"] += slow
+    _record(breaker, not slow, seconds)
+    return text
+
+
+def get_llm_gateway_stats() -> dict:
+    stats     = dict(_gw_stats)
+    latencies = sorted(_latencies)
+    outcomes  = list(_outcomes)
+
+    def _pct(p):
+        return round(latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))], 2) if latencies else None
+
+    return {
+        **stats,
+        "inflight":         _active,
+        "max_inflight":     LLM_MAX_INFLIGHT,
+        "breaker_state":    _breaker_for(LLM_MODEL).state,
+        "breaker_opens":    _breaker_for(LLM_MODEL).opens,
+        "breakers":         {m: {"state": b.state, "opens": b.opens} for m, b in _breakers.items()},
+        "latency_p50_s":    _pct(50),
+        "latency_p95_s":    _pct(95),
+        "recent_error_rate_pct": round(outcomes.count(False) / len(outcomes) * 100, 1) if outcomes else 0.0
+    }
 
 LANGUAGE_NAMES: dict[str, str] = {
     "en": "English",
@@ -55,32 +287,115 @@ def _build_system_prompt(language: str = "en") -> str:
 # FUNCTION 1 — GENERATE RECOMMENDATION
 # Main function called by recommend.py route
 # ─────────────────────────────────────────
-def generate_recommendation(context: dict, language: str = "en") -> str:
+def generate_recommendation(context: dict, language: str = "en", deadline: float = None) -> str:
     """
     Generates plain language harvest + market recommendation.
     Loads prompt from harvest_prompt.txt and fills in context.
     Responds in the given language (en/hi/mr/te/ta/kn).
+    Answers are cached on the bucketed context (llm_cache_service).
     """
-    prompt = _build_prompt("harvest_prompt.txt", context)
+    return http_service.run_io(_generate_recommendation(context, language, deadline))
+
+
+async def generate_recommendation_async(context: dict, language: str = "en", deadline: float = None) -> str:
+    """generate_recommendation for async routes — deadline is a time.monotonic() value."""
+    return await http_service.await_io(_generate_recommendation(context, language, deadline))
+
+
+async def _generate_recommendation(context: dict, language: str, deadline: float) -> str:
+    key, messages = _recommendation_request(context, language)
+    cached = get_cached_response(key, context)
+    if cached is not None:
+        return cached
 
     try:
-        response = client.chat.completions.create(
-            model    = LLM_MODEL,
-            messages = [
-                {"role": "system", "content": _build_system_prompt(language)},
-                {"role": "user",   "content": prompt}
-            ],
-            temperature = 0.3,
-            max_tokens  = 300
-        )
-        text = response.choices[0].message.content
-        # Sanitize: replace ₹ symbol with Rs. to avoid encoding issues in transit
-        text = text.replace('\u20b9', 'Rs.').replace('â\x82¹', 'Rs.').replace('â‚¹', 'Rs.')
+        start = time.perf_counter()
+        text  = await _chat(messages, max_tokens=300, deadline=deadline)
+        if not text:
+            raise LLMUnavailable("empty reply")
+        text  = _sanitize(text)
+        save_response(key, context, text, time.perf_counter() - start)
         return text
 
-    except Exception as e:
+    except LLMUnavailable:
         # Fallback — rule-based plain text if LLM fails
         return _fallback_recommendation(context)
+    except Exception as e:
+        print(f"⚠️ Could not use LLM reply ({e}). Using rule-based advice.")
+        return _fallback_recommendation(context)
+
+
+async def stream_recommendation(context: dict, language: str = "en", deadline: float = None):
+    """
+    generate_recommendation() as an async generator of text chunks, for
+    the streaming endpoint. A cached answer comes back as one chunk;
+    otherwise tokens are yielded as the LLM produces them (the call runs
+    on the I/O loop and hands chunks over). If the LLM fails before the
+    first token, the rule-based fallback is yielded instead; if it fails
+    after some tokens were sent, LLMUnavailable is raised so the caller
+    can tell the client the advice is incomplete.
+    """
+    key, messages = _recommendation_request(context, language)
+    cached = get_cached_response(key, context)
+    if cached is not None:
+        yield cached
+        return
+
+    loop   = asyncio.get_running_loop()
+    queue  = asyncio.Queue()
+    start  = time.perf_counter()
+    call   = asyncio.ensure_future(http_service.await_io(_chat(
+        messages, max_tokens=300, deadline=deadline,
+        on_chunk=lambda delta: loop.call_soon_threadsafe(queue.put_nowait, delta)
+    )))
+
+    def _finished(future):
+        if not future.cancelled():
+            future.exception()          # retrieved here; re-raised by call.result() below
+        queue.put_nowait(None)
+    call.add_done_callback(_finished)
+
+    chunks = []
+    try:
+        while True:
+            delta = await queue.get()
+            if delta is None:
+                break
+            chunks.append(_sanitize(delta))
+            yield chunks[-1]
+    finally:
+        # Client went away (generator closed): stop the LLM call and free its gateway slot
+        if not call.done():
+            call.cancel()
+
+    try:
+        call.result()
+    except LLMUnavailable as e:
+        if chunks:
+            raise LLMUnavailable(f"advice cut off after {len(chunks)} chunks: {e}") from e
+        yield _fallback_recommendation(context)
+        return
+    save_response(key, context, "".join(chunks), time.perf_counter() - start)
+
+
+def _recommendation_request(context: dict, language: str):
+    """(cache key, chat messages) for a harvest recommendation."""
+    template = _get_template("harvest_prompt.txt")
+    key      = response_key(
+        "harvest", language, context,
+        fields = template["fields"] if template else None,
+        extra  = f"{LLM_MODEL}|{template['digest'] if template else 'inline'}"
+    )
+    messages = [
+        {"role": "system", "content": _build_system_prompt(language)},
+        {"role": "user",   "content": _build_prompt("harvest_prompt.txt", context, template)}
+    ]
+    return key, messages
+
+
+def _sanitize(text: str) -> str:
+    # Replace ₹ symbol with Rs. to avoid encoding issues in transit
+    return text.replace('\u20b9', 'Rs.').replace('â\x82¹', 'Rs.').replace('â‚¹', 'Rs.')
 
 
 # ─────────────────────────────────────────
@@ -92,12 +407,20 @@ def generate_spoilage_advice(context: dict) -> str:
     Generates plain language spoilage risk advice.
     Loads prompt from spoilage_prompt.txt and fills in context.
     """
+    return http_service.run_io(_generate_spoilage_advice(context, None))
+
+
+async def generate_spoilage_advice_async(context: dict, deadline: float = None) -> str:
+    """generate_spoilage_advice for async routes."""
+    return await http_service.await_io(_generate_spoilage_advice(context, deadline))
+
+
+async def _generate_spoilage_advice(context: dict, deadline: float) -> str:
     prompt = _build_prompt("spoilage_prompt.txt", context)
 
     try:
-        response = client.chat.completions.create(
-            model    = LLM_MODEL,
-            messages = [
+        text = await _chat(
+            [
                 {
                     "role": "system",
                     "content": (
@@ -108,39 +431,119 @@ def generate_spoilage_advice(context: dict) -> str:
                 },
                 {"role": "user", "content": prompt}
             ],
-            temperature = 0.3,
-            max_tokens  = 200
+            max_tokens = 200,
+            deadline   = deadline
         )
-        return response.choices[0].message.content
+        return text or _fallback_spoilage(context)
 
-    except Exception as e:
+    except LLMUnavailable:
         return _fallback_spoilage(context)
 
 
 # ─────────────────────────────────────────
-# HELPER — BUILD PROMPT FROM FILE
+# HELPER — PROMPT TEMPLATES
+# Every prompt/*.txt is read and parsed once at startup: its text, the
+# context keys it needs and a digest (part of the LLM cache key, so an
+# edited prompt never serves answers written for the old one).
+# The file's mtime is re-checked at most every PROMPT_CHECK_SECONDS and
+# a changed file is re-parsed and swapped in without a restart; an edit
+# that doesn't parse is reported and the last good version stays live.
 # ─────────────────────────────────────────
-def _build_prompt(filename: str, context: dict) -> str:
-    """
-    Loads prompt template from prompts/ folder
-    and fills in context values.
-    Falls back to inline prompt if file missing.
-    """
-    BASE_DIR     = os.path.dirname(os.path.abspath(__file__))
-    PROMPTS_DIR  = os.path.join(BASE_DIR, "../prompt")
-    prompt_path  = os.path.join(PROMPTS_DIR, filename)
-
+PROMPTS_DIR          = os.path.join(os.path.dirname(os.path.abspath(__file__)), "../prompt")
+PROMPT_CHECK_SECONDS = 2.0
+
+_templates: dict = {}          # filename → {"text", "fields", "digest", "mtime", "checked_at"}
+_templates_lock  = threading.Lock()
+
+
+def _compile_template(filename: str) -> dict:
+    """Read and validate one template. Raises OSError / ValueError."""
+    path = os.path.join(PROMPTS_DIR, filename)
+    mtime = os.stat(path).st_mtime_ns
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+
+    fields = set()
+    for _, field, _, _ in string.Formatter().parse(text):   # ValueError on stray braces
+        if field is None:
+            continue
+        if field == "" or field.isdigit():
+            raise ValueError(f"positional field {{{field}}} — use a named key")
+        fields.add(field.split(".")[0].split("[")[0])
+
+    return {
+        "text":       text,
+        "fields":     frozenset(fields),
+        "digest":     hashlib.sha1(text.encode("utf-8")).hexdigest()[:12],
+        "mtime":      mtime,
+        "checked_at": time.monotonic()
+    }
+
+
+def _load_templates() -> list:
     try:
-        with open(prompt_path, "r", encoding="utf-8") as f:
-            template = f.read()
-        return template.format(**context)
+        names = sorted(n for n in os.listdir(PROMPTS_DIR) if n.endswith(".txt"))
     except FileNotFoundError:
+        print(f"⚠️ Prompt folder not found at {PROMPTS_DIR}. Using inline prompts.")
+        return []
+    for name in names:
+        try:
+            _templates[name] = _compile_template(name)
+        except (OSError, ValueError) as e:
+            print(f"❌ Prompt {name} is invalid ({e}). Using inline prompt.")
+    return sorted(_templates)
+
+
+_loaded_templates = _load_templates()
+print(f"✅ Prompt templates loaded: {', '.join(_loaded_templates) or 'none'}")
+
+
+def _get_template(filename: str):
+    """Compiled template for filename (reloaded if the file changed), or None."""
+    entry = _templates.get(filename)
+    now   = time.monotonic()
+    if entry is not None and now - entry["checked_at"] < PROMPT_CHECK_SECONDS:
+        return entry
+
+    with _templates_lock:
+        entry = _templates.get(filename)
+        if entry is not None and now - entry["checked_at"] < PROMPT_CHECK_SECONDS:
+            return entry
+        try:
+            mtime = os.stat(os.path.join(PROMPTS_DIR, filename)).st_mtime_ns
+        except OSError:
+            mtime = None                    # file gone — keep serving what we have
+        if mtime is not None and (entry is None or mtime != entry["mtime"]):
+            try:
+                fresh = _compile_template(filename)
+                if entry is not None:
+                    print(f"✅ Prompt {filename} reloaded ({entry['digest']} → {fresh['digest']})")
+                entry = _templates[filename] = fresh
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Prompt {filename} not reloaded ({e}). Keeping previous version.")
+                if entry is not None:
+                    entry["mtime"] = mtime  # warn once per edit, not on every check
+        if entry is not None:
+            entry["checked_at"] = now
+        return entry
+
+
+def _build_prompt(filename: str, context: dict, template: dict = None) -> str:
+    """
+    Fills the cached template for filename with context values.
+    Falls back to inline prompt if the template is missing or the
+    context lacks any key it needs.
+    """
+    template = template or _get_template(filename)
+    if template is None:
         # Fallback inline prompt
         return _inline_prompt(filename, context)
-    except KeyError as e:
-        # Missing key in context — use what we have
-        print(f"⚠️ Prompt key missing: {e}. Using partial context.")
+
+    missing = template["fields"] - context.keys()
+    if missing:
+        print(f"⚠️ Prompt keys missing for {filename}: {', '.join(sorted(missing))}. Using inline prompt.")
         return _inline_prompt(filename, context)
+    return template["text"].format(**context)
 
 
 def _inline_prompt(filename: str, context: dict) -> str:
@@ -224,6 +627,15 @@ def grade_crop_from_image(base64_image: str, crop: str) -> dict:
     Uses llama-3.2-11b-vision-preview via Groq.
     Returns AGMARK grade (A/B/C) with actionable tips.
     """
+    return http_service.run_io(_grade_crop(base64_image, crop))
+
+
+async def grade_crop_from_image_async(base64_image: str, crop: str) -> dict:
+    """grade_crop_from_image for async routes."""
+    return await http_service.await_io(_grade_crop(base64_image, crop))
+
+
+async def _grade_crop(base64_image: str, crop: str) -> dict:
     import json
 
     prompt_text = (
@@ -244,8 +656,8 @@ def grade_crop_from_image(base64_image: str, crop: str) -> dict:
     )
 
     try:
-        response = client.chat.completions.create(
-            model="llama-3.2-11b-vision-preview",
+        text = await _chat(
+            model=VISION_MODEL,
             messages=[{
                 "role": "user",
                 "content": [
@@ -259,7 +671,7 @@ def grade_crop_from_image(base64_image: str, crop: str) -> dict:
             temperature=0.1,
             max_tokens=250
         )
-        text = response.choices[0].message.content.strip()
+        text = text.strip()
         # Extract JSON block
         if "{" in text:
             text = text[text.index("{"):text.rindex("}")+1]
@@ -3,7 +3,18 @@
 import pandas as pd
 import numpy as np
 import os
+import sys
+from functools import lru_cache
 from catboost import CatBoostRegressor
+from sklearn.neighbors import BallTree
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from services.crop_profiles import resolve_crop_name
+from services.geo_service import (
+    register_markets, lookup_coordinates,
+    EARTH_RADIUS_KM, ROAD_FACTOR, AVG_SPEED_KMH
+)
 
 # ─────────────────────────────────────────
 # LOAD MODEL ONCE AT STARTUP
@@ -28,6 +39,124 @@ df_mandi["State"]     = df_mandi["State"].str.strip().str.title()
 df_mandi["Market"]    = df_mandi["Market"].str.strip().str.title()
 print(f"✅ Mandi data loaded: {len(df_mandi):,} rows")
 
+_seeded = register_markets(df_mandi[["Market", "District", "State"]].drop_duplicates())
+print(f"✅ Gazetteer seeded with {_seeded} mandi markets")
+
+
+# ─────────────────────────────────────────
+# COMMODITY NAME INDEX
+# Canonical crop (via crop_profiles alias index) → the Agmarknet
+# spelling used in df_mandi, so "Brinjal", "baingan" and "वांगी" all
+# hit the same rows. Most frequent spelling wins when several map.
+# ─────────────────────────────────────────
+def _build_commodity_index() -> dict:
+    counts = df_mandi["Commodity"].value_counts()
+    index  = {}
+    for name in counts.index:
+        index.setdefault(resolve_crop_name(name), name)
+    return index
+
+MANDI_COMMODITIES = set(df_mandi["Commodity"].unique())
+COMMODITY_INDEX   = _build_commodity_index()
+
+
+def resolve_commodity(commodity: str) -> str:
+    """Any crop name → the Commodity spelling used in the mandi data."""
+    name = commodity.strip().title()
+    if name in MANDI_COMMODITIES:
+        return name
+    return COMMODITY_INDEX.get(resolve_crop_name(commodity), name)
+
+
+# ─────────────────────────────────────────
+# MARKET COORDINATES + NEAREST-MANDI INDEX
+# Every df_mandi market placed once (geo_service), then a BallTree on
+# haversine distance per commodity — built on first use — so "closest
+# mandis that trade Tomato" is a tree query, not a scan of the table.
+# ─────────────────────────────────────────
+def _build_market_table() -> pd.DataFrame:
+    markets = df_mandi[["Market", "District", "State"]].drop_duplicates(["Market", "State"])
+    rows    = []
+    for market, district, state in markets.itertuples(index=False):
+        point = lookup_coordinates(market, state) or lookup_coordinates(district, state)
+        if point:
+            rows.append((market, district, state, point["lat"], point["lon"], point["precision"]))
+    return pd.DataFrame(rows, columns=["Market", "District", "State", "lat", "lon", "precision"])
+
+
+def _build_latest_prices() -> dict:
+    """(Commodity, Market, State) → (last modal price, its date)."""
+    latest = (
+        df_mandi.sort_values("Arrival_Date")
+        .groupby(["Commodity", "Market", "State"])[["Modal_Price", "Arrival_Date"]]
+        .last()
+    )
+    dates = latest["Arrival_Date"].dt.strftime("%Y-%m-%d")
+    return {key: (round(float(price), 2), date)
+            for key, price, date in zip(latest.index, latest["Modal_Price"], dates)}
+
+
+MARKET_TABLE   = _build_market_table()
+MARKET_RADIANS = np.radians(MARKET_TABLE[["lat", "lon"]].to_numpy())
+_MARKET_ROW    = {key: i for i, key in enumerate(zip(MARKET_TABLE["Market"], MARKET_TABLE["State"]))}
+_MARKET_INFO   = [{"market": m, "district": d, "state": st, "lat": la, "lon": lo, "precision": pr}
+                  for m, d, st, la, lo, pr in MARKET_TABLE.itertuples(index=False)]
+LATEST_PRICES  = _build_latest_prices()
+print(f"✅ Market index built: {len(MARKET_TABLE)} mandis placed")
+
+
+@lru_cache(maxsize=512)
+def _market_tree(commodity: str):
+    """(BallTree, MARKET_TABLE row numbers) for markets trading commodity; None = all markets."""
+    if commodity is None:
+        rows = np.arange(len(MARKET_TABLE))
+    else:
+        traded = df_mandi.loc[df_mandi["Commodity"] == commodity, ["Market", "State"]].drop_duplicates()
+        rows   = np.array(sorted({_MARKET_ROW[key] for key in zip(traded["Market"], traded["State"])
+                                  if key in _MARKET_ROW}), dtype=int)
+    if len(rows) == 0:
+        return None, rows
+    return BallTree(MARKET_RADIANS[rows], metric="haversine"), rows
+
+
+def nearest_markets(lat: float, lon: float, k: int = 5, commodity: str = None) -> dict:
+    """
+    The k mandis closest to a point (straight-line), optionally only those
+    that trade commodity. Each market carries straight-line and estimated
+    road distance / hours and the latest modal price for the commodity.
+    """
+    commodity = resolve_commodity(commodity) if commodity else None
+    tree, rows = _market_tree(commodity)
+    if tree is None:
+        return {"error": f"No mapped mandis trade {commodity}"}
+
+    k = max(1, min(k, len(rows)))
+    dist, idx = tree.query(np.radians([[lat, lon]]), k=k)
+
+    markets = []
+    for row, straight_km in zip(rows[idx[0]].tolist(), (dist[0] * EARTH_RADIUS_KM).tolist()):
+        road_km = straight_km * ROAD_FACTOR
+        entry   = {
+            **_MARKET_INFO[row],
+            "distance_km":       round(straight_km, 1),
+            "est_road_km":       round(road_km, 1),
+            "est_transit_hours": round(road_km / AVG_SPEED_KMH, 1)
+        }
+        if commodity:
+            price, date = LATEST_PRICES[(commodity, entry["market"], entry["state"])]
+            entry["latest_price"] = price
+            entry["latest_date"]  = date
+        markets.append(entry)
+
+    nearest = markets[0]
+    return {
+        "origin":    {"lat": lat, "lon": lon},
+        "commodity": commodity,
+        "markets":   markets,
+        "summary":   f"Nearest mandi{' for ' + commodity if commodity else ''} is "
+                     f"{nearest['market']} ({nearest['state']}), ~{nearest['est_road_km']} km by road"
+    }
+
 
 # ─────────────────────────────────────────
 # HELPERS
@@ -68,7 +197,7 @@ def predict_price(
         "State":        state.strip().title(),
         "District":     district.strip().title(),
         "Market":       market.strip().title(),
-        "Commodity":    commodity.strip().title(),
+        "Commodity":    resolve_commodity(commodity),
         "Variety":      variety.strip().title(),
         "Grade":        grade.strip().title(),
         "season":       get_season(parsed_date.month),
@@ -83,7 +212,7 @@ def predict_price(
     predicted_price = round(max(0, predicted_price), 2)
 
     return {
-        "commodity":       commodity.title(),
+        "commodity":       features["Commodity"],
         "market":          market.title(),
         "state":           state.title(),
         "date":            str(parsed_date.date()),
@@ -110,7 +239,7 @@ def get_price_trend(commodity: str, state: str) -> dict:
         trend direction, percentage change, and plain language summary
     """
 
-    commodity = commodity.strip().title()
+    commodity = resolve_commodity(commodity)
     state     = state.strip().title()
 
     # Filter to this commodity + state
@@ -188,7 +317,7 @@ def get_best_markets(commodity: str, state: str, top_n: int = 3) -> dict:
         ranked list of markets with average prices
     """
 
-    commodity = commodity.strip().title()
+    commodity = resolve_commodity(commodity)
     state     = state.strip().title()
 
     filtered = df_mandi[
@@ -280,7 +409,7 @@ def get_arrival_surge_prediction(
     Predicts weeks with historically high arrival volume for a crop+state.
     Returns alert if the next few weeks are surge weeks → price crash risk.
     """
-    commodity = commodity.strip().title()
+    commodity = resolve_commodity(commodity)
     state     = state.strip().title()
 
     filtered = df_mandi[
@@ -0,0 +1,160 @@
+# backend/services/route_service.py
+#
+# Persistent origin → destination route cache for OLA Maps transit lookups
+#
+#   get_cached_route(origin, dest)   → stored transit result or None
+#   save_route(origin, dest, result) → keep it (in memory + data/geo/route_cache.json)
+#
+# Road distances between a district and a mandi almost never change, so a
+# route is fetched once and kept for ROUTE_TTL_DAYS. Points are snapped to
+# ROUTE_SNAP_DEG (~1 km) so nearby spellings of a place share one entry.
+# Each stored result carries the Haversine sanity-check outcome, so a route
+# OLA got wrong is not re-fetched just to be rejected again.
+
+import os
+import sys
+import json
+import time
+import atexit
+import threading
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from services.cache_service import TTLCache
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ROUTE_CACHE_PATH = os.getenv(
+    "ROUTE_CACHE_PATH",
+    os.path.join(BASE_DIR, "../data/geo/route_cache.json")
+)
+
+ROUTE_TTL_DAYS  = float(os.getenv("ROUTE_TTL_DAYS", "30"))
+ROUTE_TTL       = ROUTE_TTL_DAYS * 86400
+ROUTE_SNAP_DEG  = 0.01
+ROUTE_CACHE_SIZE = 50_000
+FLUSH_SECONDS   = 60       # at most one disk write per minute (plus one at exit)
+
+_routes = TTLCache("routes", maxsize=ROUTE_CACHE_SIZE, ttl=ROUTE_TTL)
+_saved: dict = {}          # key → {"stored_at", "route"} — what is written to disk
+_lock        = threading.Lock()
+_stats       = {"saved": 0, "sanity_passed": 0, "sanity_rejected": 0}
+_dirty       = False
+_flush_timer = None         # pending background write, if any
+
+
+def _snap(value: float) -> str:
+    return f"{round(value / ROUTE_SNAP_DEG) * ROUTE_SNAP_DEG:.2f}"
+
+
+def route_key(origin: dict, dest: dict) -> str:
+    """'18.52,73.86>19.99,73.79' — origin and destination snapped to the grid."""
+    return (f"{_snap(origin['lat'])},{_snap(origin['lon'])}>"
+            f"{_snap(dest['lat'])},{_snap(dest['lon'])}")
+
+
+# ─────────────────────────────────────────
+# LOAD / PERSIST
+# ─────────────────────────────────────────
+def _load() -> int:
+    try:
+        with open(ROUTE_CACHE_PATH, encoding="utf-8") as f:
+            stored = json.load(f)
+    except FileNotFoundError:
+        return 0
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Could not read route cache ({e}). Starting empty.")
+        return 0
+
+    now = time.time()
+    for key, entry in stored.items():
+        if now - entry["stored_at"] >= ROUTE_TTL:
+            continue
+        _saved[key] = entry
+        _routes.set(key, entry["route"], stored_at=entry["stored_at"])
+    return len(_saved)
+
+
+def flush() -> None:
+    """Write every live route to disk (atomic replace) if anything changed."""
+    global _dirty, _flush_timer
+    with _lock:
+        _flush_timer = None
+        if not _dirty:
+            return
+        now = time.time()
+        for k in [k for k, v in _saved.items() if now - v["stored_at"] >= ROUTE_TTL]:
+            del _saved[k]
+        snapshot = dict(_saved)
+        _dirty   = False
+
+    tmp = f"{ROUTE_CACHE_PATH}.tmp"
+    try:
+        os.makedirs(os.path.dirname(ROUTE_CACHE_PATH), exist_ok=True)
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f, ensure_ascii=False, indent=0, sort_keys=True)
+        os.replace(tmp, ROUTE_CACHE_PATH)
+    except OSError as e:
+        print(f"⚠️ Could not save route cache: {e}")
+
+atexit.register(flush)
+
+
+_loaded = _load()
+print(f"✅ Route cache loaded: {_loaded} saved routes")
+
+
+# ─────────────────────────────────────────
+# LOOKUP / SAVE
+# ─────────────────────────────────────────
+def get_cached_route(origin: dict, dest: dict):
+    """Stored transit result for this origin/destination pair, or None."""
+    route = _routes.get(route_key(origin, dest))
+    return dict(route) if route else None
+
+
+def save_route(origin: dict, dest: dict, route: dict) -> None:
+    """
+    Keep a transit result built from an OLA Maps response.
+    route should include "sanity_check": {"passed": bool, ...}.
+    The file is rewritten by a background flush, never on the request path.
+    """
+    global _dirty, _flush_timer
+    key   = route_key(origin, dest)
+    entry = {"stored_at": time.time(), "route": route}
+    _routes.set(key, route, stored_at=entry["stored_at"])
+    passed = route.get("sanity_check", {}).get("passed", True)
+    with _lock:
+        _saved[key] = entry
+        _stats["saved"] += 1
+        _stats["sanity_passed" if passed else "sanity_rejected"] += 1
+        _dirty = True
+        if _flush_timer is None:
+            _flush_timer = threading.Timer(FLUSH_SECONDS, flush)
+            _flush_timer.daemon = True
+            _flush_timer.start()
+
+
+def get_route_cache_stats() -> dict:
+    with _lock:
+        stats     = dict(_stats)
+        persisted = len(_saved)
+    return {**_routes.stats(), "persisted": persisted, "snap_deg": ROUTE_SNAP_DEG, **stats}
+
+
+# ─────────────────────────────────────────
+# QUICK TEST — python route_service.py
+# ─────────────────────────────────────────
+if __name__ == "__main__":
+    pune, nashik = {"lat": 18.5204, "lon": 73.8567}, {"lat": 19.9975, "lon": 73.7898}
+    save_route(pune, nashik, {"transit_hours": 4.4, "distance_km": 211.0, "source": "ola_maps",
+                              "sanity_check": {"haversine_km": 164.3, "route_km": 211.0, "passed": True}})
+
+    print(f"  Pune → Nashik   : {get_cached_route({'lat': 18.521, 'lon': 73.857}, nashik)}")
+    print(f"  Nashik → Pune   : {get_cached_route(nashik, pune)}")
+
+    n     = 100_000
+    start = time.perf_counter()
+    for _ in range(n):
+        get_cached_route(pune, nashik)
+    print(f"\n  {(time.perf_counter() - start) / n * 1e6:.2f} µs per lookup")
+    print(f"  {get_route_cache_stats()}")
@@ -1,11 +1,19 @@
 # backend/services/weather_service.py
 
 import os
+import sys
 import time
-import requests
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import asyncio
+import httpx
 from dotenv import load_dotenv
 
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from services import http_service
+from services.cache_service import TTLCache
+from services.geo_service import lookup_coordinates, save_coordinates, grid_cell as _grid_cell
+from services.climatology_service import record_observation, lookup_climatology, get_climatology_stats
+
 load_dotenv()
 
 # ─────────────────────────────────────────
@@ -19,12 +27,29 @@ BASE_URL_FORECAST   = "https://api.openweathermap.org/data/2.5/forecast"
 BASE_URL_GEO        = "http://api.openweathermap.org/geo/1.0/direct"
 
 # ─────────────────────────────────────────
-# SIMPLE IN-MEMORY CACHE
-# Avoids repeated API calls for same location
-# TTL = 10 minutes
+# IN-MEMORY CACHE — SPATIAL GRID
+# Weather is cached per grid cell (default 0.1° ≈ 11 km), not per name:
+# neighbouring districts, spelling variants and state-centre fallbacks
+# that land in one cell share a single upstream fetch.
+# TTL = 10 minutes, LRU-bounded, concurrent misses share one fetch
 # ─────────────────────────────────────────
-_cache: dict = {}
-CACHE_TTL = 600  # seconds
+CACHE_TTL          = 600  # seconds
+STALE_GRACE        = 300  # serve up to 5 min past TTL while a refresh runs
+WEATHER_CACHE_SIZE = int(os.getenv("WEATHER_CACHE_SIZE", "2048"))
+WEATHER_GRID_DEG   = float(os.getenv("WEATHER_GRID_DEG", "0.1"))
+
+_cache      = TTLCache("weather", maxsize=WEATHER_CACHE_SIZE, ttl=CACHE_TTL, stale_ttl=STALE_GRACE)
+_name_cells = TTLCache("weather_cells", maxsize=8192, ttl=86400)   # "city|state" → cell
+
+
+def grid_cell(lat: float, lon: float) -> tuple:
+    """Integer (row, col) of the WEATHER_GRID_DEG cell containing a point."""
+    return _grid_cell(lat, lon, WEATHER_GRID_DEG)
+
+
+def cell_center(cell: tuple) -> dict:
+    return {"lat": round(cell[0] * WEATHER_GRID_DEG, 4),
+            "lon": round(cell[1] * WEATHER_GRID_DEG, 4)}
 
 # ─────────────────────────────────────────
 # INDIA STATE → COORDINATES MAP
@@ -67,31 +92,46 @@ STATE_COORDINATES = {
 
 # ─────────────────────────────────────────
 # HELPER — GET COORDINATES
-# Tries OpenWeather geocoding first,
+# Offline gazetteer first (districts + every mandi market),
+# OpenWeather geocoding only for names it has never seen,
 # falls back to state coordinates map
 # Also used by recommend.py for OLA Maps
 # ─────────────────────────────────────────
-def get_coordinates(city: str, state: str) -> dict:
-    """
-    Gets lat/lon for a city+state combination.
-    Tries OpenWeather geocoding first, falls back to state center.
-    Called by both weather functions AND recommend.py OLA Maps logic.
-    """
+GEOCODE_RETRY_SECONDS = 3600   # don't re-ask the geocoder about a failed name for an hour
+
+_geocode_misses = TTLCache("geocode_misses", maxsize=4096, ttl=GEOCODE_RETRY_SECONDS)
+
+
+async def _geocode(city: str, state: str):
+    """Single OpenWeather geocoding call. Returns (lat, lon) or None."""
     try:
-        response = requests.get(
+        response = await http_service.aget(
             BASE_URL_GEO,
             params={
                 "q":     f"{city},{state},IN",
                 "limit": 1,
                 "appid": OPENWEATHER_API_KEY
-            },
-            timeout=5
+            }
         )
         data = response.json()
-        if data and len(data) > 0:
-            return {"lat": data[0]["lat"], "lon": data[0]["lon"]}
+        if isinstance(data, list) and len(data) > 0:
+            return data[0]["lat"], data[0]["lon"]
     except Exception:
         pass
+    return None
+
+
+def _plan_coordinates(city: str, state: str):
+    """Stored point (or None) and whether the network geocoder should be asked."""
+    point     = lookup_coordinates(city, state)
+    can_fetch = (bool(OPENWEATHER_API_KEY) and
+                 _geocode_misses.get(f"{city.lower()}|{state.lower()}") is None)
+    return point, can_fetch and (point is None or point["precision"] == "market")
+
+
+def _fallback_coordinates(point, state: str) -> dict:
+    if point:
+        return {"lat": point["lat"], "lon": point["lon"]}
 
     # Fallback to state coordinates
     state_title = state.strip().title()
@@ -102,6 +142,32 @@ def get_coordinates(city: str, state: str) -> dict:
     return {"lat": 20.5937, "lon": 78.9629}
 
 
+async def get_coordinates_async(city: str, state: str) -> dict:
+    """get_coordinates() for code already running on the http_service I/O loop."""
+    point, needs_geocode = _plan_coordinates(city, state)
+    if needs_geocode:
+        found = await _geocode(city, state)
+        if found:
+            save_coordinates(city, state, *found)
+            return {"lat": found[0], "lon": found[1]}
+        _geocode_misses.set(f"{city.lower()}|{state.lower()}", True)
+    return _fallback_coordinates(point, state)
+
+
+def get_coordinates(city: str, state: str) -> dict:
+    """
+    Gets lat/lon for a city+state combination.
+    Uses the offline gazetteer; unknown names (and mandis only known by
+    their district) are geocoded once and written back to it.
+    Falls back to state center.
+    Called by both weather functions AND recommend.py OLA Maps logic.
+    """
+    point, needs_geocode = _plan_coordinates(city, state)
+    if needs_geocode:
+        return http_service.run_io(get_coordinates_async(city, state))
+    return _fallback_coordinates(point, state)
+
+
 # ─────────────────────────────────────────
 # HELPER — INTERPRET WEATHER FOR FARMING
 # Converts raw weather data into farming signals
@@ -195,6 +261,121 @@ def interpret_weather(temp: float, humidity: float,
     }
 
 
+# ─────────────────────────────────────────
+# HELPER — DEGRADED READINGS
+# With no API key, or when OpenWeather fails / the rate limit is spent,
+# fall back in order:
+#   fresh cache → stale cache (STALE_GRACE) → last good reading for the
+#   grid cell (up to LAST_GOOD_TTL old) → local climatology for this
+#   place and week → mock data
+# ─────────────────────────────────────────
+LAST_GOOD_TTL = 6 * 3600
+
+_last_good = TTLCache("weather_last_good", maxsize=WEATHER_CACHE_SIZE, ttl=LAST_GOOD_TTL)
+
+
+class WeatherUnavailable(Exception):
+    """Upstream failed; carries the best fallback result so callers can still answer."""
+
+    def __init__(self, result: dict):
+        super().__init__("OpenWeather unavailable")
+        self.result = result
+
+
+def _degraded(part: str, city: str, state: str, coords: dict) -> dict:
+    cell  = grid_cell(coords["lat"], coords["lon"]) if coords else None
+    saved = _last_good.get(cell) if cell else None
+    if saved:
+        age = _last_good.age(cell) or 0
+        return {**saved[part], "city": city.title(), "state": state.title(),
+                "source": "cached", "cached_age_minutes": round(age / 60)}
+
+    typical = None
+    if coords:
+        build   = _climatology_current if part == "current" else _climatology_forecast
+        typical = build(city, state, coords)
+    if typical:
+        return typical
+    return _mock_weather(city, state) if part == "current" else _mock_forecast(city, state)
+
+
+def _climatology_current(city: str, state: str, coords: dict):
+    normal = lookup_climatology(coords["lat"], coords["lon"])
+    if normal is None:
+        return None
+    signals = interpret_weather(normal["temperature"], normal["humidity"],
+                                normal["rainfall_mm"], normal["wind_speed_ms"])
+    return {
+        "city":            city.title(),
+        "state":           state.title(),
+        "temperature":     normal["temperature"],
+        "humidity":        normal["humidity"],
+        "rainfall_mm":     normal["rainfall_mm"],
+        "wind_speed_ms":   normal["wind_speed_ms"],
+        "description":     f"typical for week {normal['week']} ({normal['samples']} past readings)",
+        "harvest_risk":    signals["harvest_risk"],
+        "transit_risk":    signals["transit_risk"],
+        "spoilage_factor": signals["spoilage_factor"],
+        "weather_summary": signals["summary"],
+        "source":          "climatology"
+    }
+
+
+def _timeline_start():
+    """Current 3-hour slot in UTC — timeline "time" is UTC, like OpenWeather's dt_txt."""
+    from datetime import datetime, timezone
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    return now.replace(hour=now.hour - now.hour % 3, minute=0, second=0, microsecond=0)
+
+
+def _climatology_forecast(city: str, state: str, coords: dict, days: int = 5):
+    from datetime import datetime, timedelta
+    today         = datetime.today()
+    start         = _timeline_start()
+    forecast_days = []
+    timeline      = []
+    for i in range(days):
+        day    = today + timedelta(days=i)
+        normal = lookup_climatology(coords["lat"], coords["lon"], when=day)
+        if normal is None:
+            return None
+        daily_rain = round(normal["rainfall_mm"] * 24, 1)   # readings are mm per hour
+        signals    = interpret_weather(normal["temperature"], normal["humidity"],
+                                       daily_rain, normal["wind_speed_ms"])
+        forecast_days.append({
+            "date":         day.strftime("%Y-%m-%d"),
+            "temperature":  normal["temperature"],
+            "humidity":     normal["humidity"],
+            "rainfall_mm":  daily_rain,
+            "harvest_risk": signals["harvest_risk"],
+            "transit_risk": signals["transit_risk"],
+            "summary":      signals["summary"]
+        })
+        for step in range(8):
+            timeline.append({
+                "time":        (start + timedelta(hours=3 * (i * 8 + step))).strftime("%Y-%m-%d %H:%M:%S"),
+                "temperature": normal["temperature"],
+                "humidity":    normal["humidity"],
+                "rainfall_mm": round(normal["rainfall_mm"] * 3, 1)
+            })
+
+    best_day = min(
+        forecast_days,
+        key=lambda d: {"Low": 1, "Medium": 2, "High": 3}[d["harvest_risk"]]
+    )
+    return {
+        "city":          city.title(),
+        "state":         state.title(),
+        "forecast":      forecast_days,
+        "best_day":      best_day["date"],
+        "best_day_risk": best_day["harvest_risk"],
+        "summary":       (f"Typical conditions for this week — best day to harvest/transport: "
+                          f"{best_day['date']} ({best_day['harvest_risk']} risk)"),
+        "timeline":      timeline,
+        "source":        "climatology"
+    }
+
+
 # ─────────────────────────────────────────
 # FUNCTION 1 — GET CURRENT WEATHER
 # Returns current conditions for a location
@@ -208,20 +389,25 @@ def get_current_weather(city: str, state: str) -> dict:
         weather_description, farming signals
     """
     if not OPENWEATHER_API_KEY:
-        return _mock_weather(city, state)
+        return _degraded("current", city, state, get_coordinates(city, state))
+    return http_service.run_io(_current_weather(city, state))
+
 
-    coords = get_coordinates(city, state)
+async def _current_weather(city: str, state: str, coords: dict = None) -> dict:
+    # Runs on the http_service I/O loop
+    coords = coords or await get_coordinates_async(city, state)
+    if not OPENWEATHER_API_KEY:
+        return _degraded("current", city, state, coords)
 
     try:
-        response = requests.get(
+        response = await http_service.aget(
             BASE_URL_CURRENT,
             params={
                 "lat":   coords["lat"],
                 "lon":   coords["lon"],
                 "appid": OPENWEATHER_API_KEY,
                 "units": "metric"
-            },
-            timeout=15
+            }
         )
         response.raise_for_status()
         data = response.json()
@@ -233,6 +419,7 @@ def get_current_weather(city: str, state: str) -> dict:
         rainfall    = data.get("rain", {}).get("1h", 0)
 
         signals = interpret_weather(temp, humidity, rainfall, wind_speed)
+        record_observation(coords["lat"], coords["lon"], temp, humidity, rainfall, wind_speed)
 
         return {
             "city":            city.title(),
@@ -249,9 +436,9 @@ def get_current_weather(city: str, state: str) -> dict:
             "source":          "live"
         }
 
-    except requests.exceptions.RequestException as e:
-        print(f"⚠️ OpenWeather API error: {e}. Using mock data.")
-        return _mock_weather(city, state)
+    except (httpx.HTTPError, http_service.UpstreamBusy) as e:
+        print(f"⚠️ OpenWeather API error: {e}. Using last good reading / climatology.")
+        return _degraded("current", city, state, coords)
 
 
 # ─────────────────────────────────────────
@@ -264,12 +451,18 @@ def get_weather_forecast(city: str, state: str, days: int = 5) -> dict:
     Returns daily forecast with farming risk per day.
     """
     if not OPENWEATHER_API_KEY:
-        return _mock_forecast(city, state)
+        return _degraded("forecast", city, state, get_coordinates(city, state))
+    return http_service.run_io(_weather_forecast(city, state, days))
+
 
-    coords = get_coordinates(city, state)
+async def _weather_forecast(city: str, state: str, days: int = 5, coords: dict = None) -> dict:
+    # Runs on the http_service I/O loop
+    coords = coords or await get_coordinates_async(city, state)
+    if not OPENWEATHER_API_KEY:
+        return _degraded("forecast", city, state, coords)
 
     try:
-        response = requests.get(
+        response = await http_service.aget(
             BASE_URL_FORECAST,
             params={
                 "lat":   coords["lat"],
@@ -277,12 +470,19 @@ def get_weather_forecast(city: str, state: str, days: int = 5) -> dict:
                 "appid": OPENWEATHER_API_KEY,
                 "units": "metric",
                 "cnt":   days * 8   # 8 readings per day (every 3hrs)
-            },
-            timeout=15
+            }
         )
         response.raise_for_status()
         data = response.json()
 
+        # Raw 3-hourly readings — used by the spoilage simulation
+        timeline = [{
+            "time":        item["dt_txt"],
+            "temperature": round(item["main"]["temp"], 1),
+            "humidity":    item["main"]["humidity"],
+            "rainfall_mm": item.get("rain", {}).get("3h", 0)
+        } for item in data["list"]]
+
         # Group by day and average
         daily = {}
         for item in data["list"]:
@@ -331,12 +531,13 @@ def get_weather_forecast(city: str, state: str, days: int = 5) -> dict:
             "best_day_risk": best_day["harvest_risk"],
             "summary":       (f"Best day to harvest/transport: {best_day['date']} "
                               f"({best_day['harvest_risk']} risk)"),
+            "timeline":      timeline,
             "source":        "live"
         }
 
-    except requests.exceptions.RequestException as e:
-        print(f"⚠️ OpenWeather forecast error: {e}. Using mock data.")
-        return _mock_forecast(city, state)
+    except (httpx.HTTPError, http_service.UpstreamBusy) as e:
+        print(f"⚠️ OpenWeather forecast error: {e}. Using last good reading / climatology.")
+        return _degraded("forecast", city, state, coords)
 
 
 # ─────────────────────────────────────────
@@ -347,35 +548,270 @@ def get_weather_insight(city: str, state: str) -> dict:
     """
     Master function — combines current weather + forecast.
     Fetches both in parallel and caches results for 10 minutes.
-    Called by recommend.py route.
+    Called by spoilage routes; async routes use get_weather_insight_async.
     """
-    cache_key = f"{city.lower()}|{state.lower()}"
-    now = time.time()
+    return http_service.run_io(_weather_insight(city, state))
 
-    # Return cached result if still fresh
-    if cache_key in _cache:
-        cached_at, cached_data = _cache[cache_key]
-        if now - cached_at < CACHE_TTL:
-            return cached_data
 
-    # Fetch current weather and forecast in parallel
-    with ThreadPoolExecutor(max_workers=2) as executor:
-        future_current  = executor.submit(get_current_weather, city, state)
-        future_forecast = executor.submit(get_weather_forecast, city, state)
+async def get_weather_insight_async(city: str, state: str) -> dict:
+    """
+    Awaitable get_weather_insight for async routes — the fetch runs on
+    the shared I/O loop, so the caller's loop is free meanwhile.
+    """
+    return await http_service.await_io(_weather_insight(city, state))
 
-        current  = future_current.result()
-        forecast = future_forecast.result()
 
-    result = {
-        "current":  current,
-        "forecast": forecast
+async def _weather_cell(city: str, state: str) -> tuple:
+    name_key = f"{city.lower()}|{state.lower()}"
+    cell     = _name_cells.get(name_key)
+    if cell is None:
+        coords = await get_coordinates_async(city, state)
+        cell   = grid_cell(coords["lat"], coords["lon"])
+        _name_cells.set(name_key, cell)
+    return cell
+
+
+async def _weather_insight(city: str, state: str) -> dict:
+    cell   = await _weather_cell(city, state)
+    _record_demand(cell, city, state)
+    try:
+        shared = await _cache.aget_or_load(cell, lambda: _fetch_weather_insight(city, state, cell))
+    except WeatherUnavailable as e:
+        shared = e.result
+
+    # Cell data is shared — hand back copies labelled with this caller's names
+    return {
+        "current":   {**shared["current"],  "city": city.title(), "state": state.title()},
+        "forecast":  {**shared["forecast"], "city": city.title(), "state": state.title()},
+        "grid_cell": shared["grid_cell"]
     }
 
-    # Cache the result
-    _cache[cache_key] = (now, result)
+
+async def _fetch_weather_insight(city: str, state: str, cell: tuple) -> dict:
+    # Fetch at the cell centre so every name in the cell gets the same reading
+    coords = cell_center(cell)
+    current, forecast = await asyncio.gather(
+        _current_weather(city, state, coords=coords),
+        _weather_forecast(city, state, coords=coords)
+    )
+
+    result = {
+        "current":   current,
+        "forecast":  forecast,
+        "grid_cell": {**coords, "resolution_deg": WEATHER_GRID_DEG}
+    }
+    if not OPENWEATHER_API_KEY:
+        return result
+    if current["source"] != "live" or forecast["source"] != "live":
+        raise WeatherUnavailable(result)   # don't cache a fallback as if it were fresh
+    _last_good.set(cell, result)
     return result
 
 
+# ─────────────────────────────────────────
+# FUNCTION 4 — WEATHER FOR MANY LOCATIONS
+# District dashboard: one call for 30–100 districts.
+# Names are deduped, then grid cells are deduped, so each cell is
+# loaded once through the same cache as single requests. Cells that
+# miss are fetched BATCH_CONCURRENCY at a time; the OpenWeather token
+# bucket still applies, and a cell that can't get a call in time falls
+# back like any other request (last good → climatology → mock).
+# ─────────────────────────────────────────
+BATCH_CONCURRENCY = 8
+
+
+async def get_weather_batch_async(locations: list, include_forecast: bool = False) -> dict:
+    """
+    locations: list of (district, state) pairs.
+    Returns {"results": [...one per unique location...], "summary": {...}}.
+    """
+    return await http_service.await_io(_weather_batch(locations, include_forecast))
+
+
+async def _weather_batch(locations: list, include_forecast: bool) -> dict:
+    unique = {}
+    for city, state in locations:
+        unique.setdefault(f"{city.strip().lower()}|{state.strip().lower()}", (city.strip(), state.strip()))
+
+    names = list(unique.values())
+    cells = await asyncio.gather(*(_weather_cell(city, state) for city, state in names))
+
+    by_cell = {}
+    for name, cell in zip(names, cells):
+        by_cell.setdefault(cell, []).append(name)
+    cached = {cell for cell in by_cell
+              if (_cache.age(cell) is not None and _cache.age(cell) < CACHE_TTL)}
+
+    limit = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+    async def _load(cell):
+        city, state = by_cell[cell][0]
+        if cell in cached:
+            return await _weather_insight(city, state)
+        async with limit:
+            return await _weather_insight(city, state)
+
+    loaded  = await asyncio.gather(*(_load(cell) for cell in by_cell))
+    by_name = {}
+    for cell, insight in zip(by_cell, loaded):
+        for city, state in by_cell[cell]:
+            by_name[(city, state)] = (cell, insight)
+
+    results = []
+    for city, state in names:
+        cell, insight = by_name[(city, state)]
+        current = insight["current"]
+        entry   = {
+            "district":        city.title(),
+            "state":           state.title(),
+            "grid_cell":       insight["grid_cell"],
+            "temperature":     current["temperature"],
+            "humidity":        current["humidity"],
+            "rainfall_mm":     current["rainfall_mm"],
+            "wind_speed_ms":   current["wind_speed_ms"],
+            "description":     current["description"],
+            "harvest_risk":    current["harvest_risk"],
+            "transit_risk":    current["transit_risk"],
+            "spoilage_factor": current["spoilage_factor"],
+            "weather_summary": current["weather_summary"],
+            "source":          current["source"],
+            "from_cache":      cell in cached
+        }
+        if include_forecast:
+            forecast = insight["forecast"]
+            entry["forecast"] = {
+                "days":          forecast.get("forecast", []),
+                "best_day":      forecast.get("best_day"),
+                "best_day_risk": forecast.get("best_day_risk"),
+                "summary":       forecast.get("summary")
+            }
+        results.append(entry)
+
+    sources = {}
+    for entry in results:
+        sources[entry["source"]] = sources.get(entry["source"], 0) + 1
+    return {
+        "results": results,
+        "summary": {
+            "requested":        len(locations),
+            "unique_locations": len(names),
+            "grid_cells":       len(by_cell),
+            "cells_from_cache": len(cached),
+            "cells_fetched":    len(by_cell) - len(cached),
+            "by_source":        sources
+        }
+    }
+
+
+def get_weather_cache_stats() -> dict:
+    return {**_cache.stats(), "grid_resolution_deg": WEATHER_GRID_DEG,
+            "names_mapped": len(_name_cells), "prefetch": dict(_prefetch_stats),
+            "climatology": get_climatology_stats()}
+
+
+# ─────────────────────────────────────────
+# BACKGROUND PREFETCH
+# Tracks how often each grid cell is asked for (decaying count) and,
+# every PREFETCH_INTERVAL, refreshes the hottest cells that are about
+# to expire — so the first farmer after the TTL doesn't wait on
+# OpenWeather. Prefetch spends at most PREFETCH_CALLS_PER_MIN of the
+# free tier's 60 calls/min; the rest stays for user-facing misses.
+# If a refresh is late, STALE_GRACE lets requests get the old reading
+# while it reloads.
+# Runs on the http_service I/O loop, started by the first weather request.
+# ─────────────────────────────────────────
+PREFETCH_ENABLED       = os.getenv("WEATHER_PREFETCH", "1") == "1"
+PREFETCH_TOP_N         = int(os.getenv("WEATHER_PREFETCH_TOP_N", "20"))
+PREFETCH_MIN_DEMAND    = float(os.getenv("WEATHER_PREFETCH_MIN_DEMAND", "2"))   # decayed requests
+PREFETCH_CALLS_PER_MIN = int(os.getenv("WEATHER_PREFETCH_CALLS_PER_MIN", "30"))
+PREFETCH_INTERVAL      = 30     # seconds between scheduler passes
+PREFETCH_LEAD          = 90     # refresh cells within this many seconds of expiry
+CALLS_PER_REFRESH      = 2      # current + forecast
+DEMAND_HALF_LIFE       = 3600   # request counts halve every hour
+DEMAND_MAX_CELLS       = 1000
+DEMAND_FORGET          = 0.01   # cells decayed below this are dropped from tracking
+
+_demand: dict  = {}             # cell → [score, updated_at, city, state]
+_prefetch_task = None
+_prefetch_stats = {"runs": 0, "refreshed": 0, "skipped_budget": 0,
+                   "errors": 0, "tracked_cells": 0, "hot_cells": 0}
+
+
+def _decayed(score: float, updated_at: float, now: float) -> float:
+    return score * 0.5 ** ((now - updated_at) / DEMAND_HALF_LIFE)
+
+
+def _record_demand(cell: tuple, city: str, state: str) -> None:
+    # Called on the I/O loop only, so no lock needed
+    global _prefetch_task
+    now   = time.time()
+    entry = _demand.get(cell)
+    score = _decayed(entry[0], entry[1], now) + 1 if entry else 1.0
+    _demand[cell] = [score, now, city, state]
+
+    if len(_demand) > DEMAND_MAX_CELLS:
+        coldest = sorted(_demand, key=lambda c: _decayed(_demand[c][0], _demand[c][1], now))
+        for c in coldest[:len(_demand) - DEMAND_MAX_CELLS // 2]:
+            del _demand[c]
+
+    if PREFETCH_ENABLED and OPENWEATHER_API_KEY and _prefetch_task is None:
+        _prefetch_task = asyncio.ensure_future(_prefetch_loop())
+
+
+def _cells_due(now: float) -> list:
+    """
+    Hottest PREFETCH_TOP_N cells that are missing or close to expiry.
+    Only cells still in demand (decayed score ≥ PREFETCH_MIN_DEMAND) count,
+    so a district asked for once days ago stops using OpenWeather quota.
+    """
+    scores = {cell: _decayed(score, updated_at, now) for cell, (score, updated_at, _, _) in _demand.items()}
+    for cell in [c for c, s in scores.items() if s < DEMAND_FORGET]:
+        del _demand[cell]
+    hot     = [c for c, s in scores.items() if s >= PREFETCH_MIN_DEMAND]
+    hottest = sorted(hot, key=scores.get, reverse=True)[:PREFETCH_TOP_N]
+    _prefetch_stats["hot_cells"] = len(hot)
+
+    due = []
+    for cell in hottest:
+        _, _, city, state = _demand[cell]
+        age = _cache.age(cell)
+        if age is None or age >= CACHE_TTL - PREFETCH_LEAD:
+            due.append((cell, city, state))
+    return due
+
+
+async def _prefetch_once() -> int:
+    now    = time.time()
+    budget = PREFETCH_CALLS_PER_MIN * PREFETCH_INTERVAL // 60
+    due    = _cells_due(now)
+    batch  = due[:budget // CALLS_PER_REFRESH]
+
+    _prefetch_stats["runs"]           += 1
+    _prefetch_stats["skipped_budget"] += len(due) - len(batch)
+    _prefetch_stats["tracked_cells"]   = len(_demand)
+
+    results = await asyncio.gather(*[
+        _cache.arefresh(cell, lambda c=cell, n=city, s=state: _fetch_weather_insight(n, s, c))
+        for cell, city, state in batch
+    ], return_exceptions=True)
+
+    errors = sum(isinstance(r, Exception) for r in results)
+    _prefetch_stats["refreshed"] += len(results) - errors
+    _prefetch_stats["errors"]    += errors
+    return len(results) - errors
+
+
+async def _prefetch_loop():
+    # Everything this task sends queues behind user-facing calls
+    http_service.PRIORITY.set(http_service.BACKGROUND)
+    while True:
+        await asyncio.sleep(PREFETCH_INTERVAL)
+        try:
+            await _prefetch_once()
+        except Exception as e:
+            print(f"⚠️ Weather prefetch error: {e}")
+
+
 # ─────────────────────────────────────────
 # MOCK DATA
 # Used when API key is missing or API fails
@@ -402,6 +838,8 @@ def _mock_forecast(city: str, state: str) -> dict:
     from datetime import datetime, timedelta
     today         = datetime.today()
     forecast_days = []
+    timeline      = []
+    start         = _timeline_start()
     for i in range(5):
         day = today + timedelta(days=i)
         forecast_days.append({
@@ -413,6 +851,13 @@ def _mock_forecast(city: str, state: str) -> dict:
             "transit_risk": "Low",
             "summary":      "Favorable conditions for harvest and transport."
         })
+    for step in range(40):
+        timeline.append({
+            "time":        (start + timedelta(hours=3 * step)).strftime("%Y-%m-%d %H:%M:%S"),
+            "temperature": 28 + step // 8,
+            "humidity":    60 + (step // 8) * 2,
+            "rainfall_mm": 0
+        })
     return {
         "city":          city.title(),
         "state":         state.title(),
@@ -420,6 +865,7 @@ def _mock_forecast(city: str, state: str) -> dict:
         "best_day":      today.strftime("%Y-%m-%d"),
         "best_day_risk": "Low",
         "summary":       f"Best day to harvest/transport: {today.strftime('%Y-%m-%d')} (Low risk)",
+        "timeline":      timeline,
         "source":        "mock"
     }
 